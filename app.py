@@ -1,164 +1,570 @@
+# --------------------
+# Concurrency mode (set up before anything else is imported)
+# --------------------
+# ASYNC_MODE=gevent: connectors, scheduler, writers, broadcasts and the web
+# server run as greenlets in one event loop (needs gevent + gevent-websocket).
+# ASYNC_MODE=threading (default): OS threads and the Werkzeug server.
 import os
-import json
+from dotenv import load_dotenv
+
+load_dotenv()
+ASYNC_MODE = os.getenv("ASYNC_MODE", "threading")
+if ASYNC_MODE == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+elif ASYNC_MODE != "threading":
+    raise SystemExit(f"ASYNC_MODE must be 'threading' or 'gevent', not {ASYNC_MODE!r}")
+
+import jsoncodec
 import uuid
 import threading
 import websocket
 import socketio as socketio_client
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, make_response, redirect
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from flask_socketio import SocketIO
-from dotenv import load_dotenv
+from flask_socketio import SocketIO, join_room, emit
 import time
+import math
 import datetime
 import re
+import random
+import atexit
+import functools
+import hmac
+import collections
+import csv
+import io
+from helpers import ts
+from journal import StateJournal
+from logwriter import LogWriter, LogTail
+from ingest import IngestQueue
+from scheduler import Scheduler, ExpiringSet
+from rewards import RewardConfig, ConfigError, minutes_for
+from broadcast import BroadcastCoalescer
+from batcher import RewardBatcher
+from supervisor import Supervisor
+from metrics import Registry, TimedLock
+from leader import OwnerLease
+from assets import AssetStore, FALLBACKS as ASSET_FALLBACKS
+from profiling import Tracer, EventProfiler, stats_text, stats_dump, sample_stacks
+from eventstore import EventStore, COLUMNS as HISTORY_COLUMNS
+from stats import TimerStats
+from dedup import DedupIndex, event_key
+import urllib.request
+import urllib.error
 
 
 # --------------------
-# Helper function for timestamp
+# ENV variables (.env is loaded at the top)
 # --------------------
-def ts():
-    return datetime.datetime.now().strftime("%d.%m.%Y - %H:%M")
+# Debug setting (show/hide RAW events)
+DEBUG_EVENTS = os.getenv("DEBUG", "1") == "1"
+
+# /debug/profile and /debug/slowest: off unless DEBUG_ENDPOINTS=1; DEBUG_TOKEN additionally requires ?token=
+DEBUG_ENDPOINTS = os.getenv("DEBUG_ENDPOINTS", "0") == "1"
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN", "")
+
+# Streamers: STREAMERS=1,2,3 (default: 1, plus 2 if SE2_TWITCH_TOKEN is set).
+# Streamer n reads LABEL_STREAMER{n}, SE{n}_TWITCH_TOKEN, SE{n}_KICK_TOKEN,
+# KICK_APP_KEY{n}, KICK_CLUSTER{n}, KICK_CHATROOM_ID{n}, TIPEEE_API_KEY{n}
+# and config{n}.json. Streamer 1 uses the unnumbered names (SE_TWITCH_TOKEN,
+# KICK_APP_KEY, config.json, ...).
+def streamer_env(n):
+    sfx = "" if n == "1" else n
+    return {
+        "label":            os.getenv(f"LABEL_STREAMER{n}", f"Streamer{n}"),
+        "se_twitch_token":  os.getenv(f"SE{sfx}_TWITCH_TOKEN"),
+        "se_kick_token":    os.getenv(f"SE{sfx}_KICK_TOKEN"),
+        "kick_app_key":     os.getenv(f"KICK_APP_KEY{sfx}"),
+        "kick_cluster":     os.getenv(f"KICK_CLUSTER{sfx}"),
+        "kick_chatroom_id": os.getenv(f"KICK_CHATROOM_ID{sfx}"),
+        "tipeee_api_key":   os.getenv(f"TIPEEE_API_KEY{sfx}"),
+        "config":           f"config{sfx}.json",
+    }
+
+if os.getenv("STREAMERS"):
+    STREAMER_IDS = [x.strip() for x in os.getenv("STREAMERS").split(",") if x.strip()]
+else:
+    STREAMER_IDS = ["1", "2"] if os.getenv("SE2_TWITCH_TOKEN") else ["1"]
+
+# SHARED_TIMER=1: all streamers add to the timer of the first streamer (old behaviour)
+SHARED_TIMER = os.getenv("SHARED_TIMER", "0") == "1"
+
+CONFIG_WATCH_INTERVAL = float(os.getenv("CONFIG_WATCH_INTERVAL", "2"))
+
+# Upstream endpoints (override to point at the local stand-ins in tools/fake_upstreams.py)
+SE_WS_URL = os.getenv("SE_WS_URL", "wss://astro.streamelements.com")
+KICK_WS_URL = os.getenv("KICK_WS_URL", "wss://ws-{cluster}.pusher.com/app/{app_key}?protocol=7")
+TIPEEE_URL = os.getenv("TIPEEE_URL", "https://sso.tipeeestream.com:443")
+
+PORT = int(os.getenv("PORT", "5000"))
+
+# Several workers: set MESSAGE_QUEUE (e.g. redis://localhost:6379/0) and start
+# app.py once per PORT. The worker holding OWNER_LOCK_FILE owns timers and
+# connectors, the others serve overlays and forward timer requests to it.
+MESSAGE_QUEUE = os.getenv("MESSAGE_QUEUE") or None
+OWNER_LOCK_FILE = os.getenv("OWNER_LOCK_FILE", "owner.lock")
+WORKER_URL = os.getenv("WORKER_URL", f"http://127.0.0.1:{PORT}")
+
+# URL the overlays use to reach the app (default: the URL the page was loaded from)
+PUBLIC_URL = os.getenv("PUBLIC_URL", "").rstrip("/")
 
 # --------------------
-# Load ENV variables
+# Flask + SocketIO setup
 # --------------------
-load_dotenv()
+class CodecJSONProvider(DefaultJSONProvider):
+    """jsonify() through jsoncodec (orjson if installed)"""
 
-# Debug setting (show/hide RAW events)
-DEBUG_EVENTS = os.getenv("DEBUG", "1") == "1"
+    def dumps(self, obj, **kwargs):
+        return jsoncodec.dumps(obj)
 
-# Streamer 1
-LABEL_STREAMER1 = os.getenv("LABEL_STREAMER1", "Streamer1")
-SE_TWITCH_TOKEN  = os.getenv("SE_TWITCH_TOKEN")
-SE_KICK_TOKEN    = os.getenv("SE_KICK_TOKEN")
-KICK_APP_KEY     = os.getenv("KICK_APP_KEY")
-KICK_CLUSTER     = os.getenv("KICK_CLUSTER")
-KICK_CHATROOM_ID = os.getenv("KICK_CHATROOM_ID")
-TIPEEE_API_KEY   = os.getenv("TIPEEE_API_KEY")
+    def loads(self, s, **kwargs):
+        return jsoncodec.loads(s)
 
-# Streamer 2
-LABEL_STREAMER2 = os.getenv("LABEL_STREAMER2", "Streamer2")
-SE2_TWITCH_TOKEN  = os.getenv("SE2_TWITCH_TOKEN")
-SE2_KICK_TOKEN    = os.getenv("SE2_KICK_TOKEN")
-KICK_APP_KEY2     = os.getenv("KICK_APP_KEY2")
-KICK_CLUSTER2     = os.getenv("KICK_CLUSTER2")
-KICK_CHATROOM_ID2 = os.getenv("KICK_CHATROOM_ID2")
-TIPEEE_API_KEY2   = os.getenv("TIPEEE_API_KEY2")
+app = Flask(__name__)
+app.json = CodecJSONProvider(app)
+CORS(app)
+socketio = SocketIO(app, cors_allowed_origins="*", json=jsoncodec, async_mode=ASYNC_MODE,
+                    message_queue=MESSAGE_QUEUE)
+# Socket.IO namespace of the control panel: timer state + time additions
+CONTROL_NAMESPACE = "/control"
 
 # --------------------
-# Load config
+# Metrics (served as Prometheus text on /metrics)
 # --------------------
-with open("config.json", "r", encoding="utf-8") as f:
-    CONFIG1 = json.load(f)
-
-CONFIG2 = None
-if SE2_TWITCH_TOKEN:  # only load if token for Streamer 2 is present
-    try:
-        with open("config2.json", "r", encoding="utf-8") as f:
-            CONFIG2 = json.load(f)
-    except FileNotFoundError:
-        print(f"[{ts()}] [WARN] SE2_TWITCH_TOKEN is set, but config2.json is missing!")
+METRICS = Registry()
+EVENTS_RECEIVED = METRICS.counter(
+    "subathon_events_received_total", "Events pushed into the ingestion queue", ("connector", "type"))
+EVENTS_APPLIED = METRICS.counter(
+    "subathon_events_applied_total", "Events processed by the reward worker", ("connector", "type"))
+HANDLE_EVENT_SECONDS = METRICS.histogram(
+    "subathon_handle_event_seconds", "Time spent in handle_event per event", ("type",))
+LOCK_WAIT_SECONDS = METRICS.histogram(
+    "subathon_lock_wait_seconds", "Time spent waiting for a timer lock", ("timer",))
+LOCK_HOLD_SECONDS = METRICS.histogram(
+    "subathon_lock_hold_seconds", "Time a timer lock was held", ("timer",))
+SAVE_STATE_SECONDS = METRICS.histogram(
+    "subathon_save_state_seconds", "Duration of save_state (queueing the journal record)", ("timer",))
+JOURNAL_COMMIT_SECONDS = METRICS.histogram(
+    "subathon_journal_commit_seconds", "Duration of one journal group commit (write + fsync)", ("timer",))
+EMIT_SECONDS = METRICS.histogram(
+    "subathon_emit_seconds", "Duration of one timer_update emit", ("timer",))
+REWARD_BATCH_SIZE = METRICS.histogram(
+    "subathon_reward_batch_size", "Rewards applied together under one timer lock", ("timer",),
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000))
+EMIT_FANOUT = METRICS.counter(
+    "subathon_emit_fanout_total", "timer_update messages delivered to clients", ("timer",))
+KICK_CHAT_SEEN = METRICS.counter(
+    "subathon_kick_chat_seen_total", "Raw Kick chat frames received", ("connector",))
+KICK_CHAT_MATCHED = METRICS.counter(
+    "subathon_kick_chat_gifts_total", "Kick chat messages matched as KICKs gift", ("connector",))
+KICK_CHAT_SAMPLED = METRICS.counter(
+    "subathon_kick_chat_sampled_total", "Ordinary Kick chat messages written to events.log", ("connector",))
+EVENTS_DUPLICATE = METRICS.counter(
+    "subathon_events_duplicate_total", "Redelivered events dropped by the dedup index", ("connector", "type"))
+
+# Per-stage timings of every event, the slowest TRACE_SLOWEST are kept for /debug/slowest
+tracer = Tracer(keep=int(os.getenv("TRACE_SLOWEST", "50")))
+# cProfile of the event path while a /debug/profile capture runs
+event_profiler = EventProfiler()
 
 # --------------------
-# Flask + SocketIO setup
+# Timer engine
 # --------------------
-app = Flask(__name__)
-CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*")
+class SubathonTimer:
+    """
+    Countdown stored as a monotonic end deadline plus the paused flag.
+    Nothing ticks: the remaining time is derived from the deadline whenever
+    it is needed, so the timer cannot drift when the server is busy.
+    Clients receive the deadline as wall clock time and count down locally.
+    """
+
+    def __init__(self, name, seconds, paused=False, max_seconds=0, journal=None, lock=None, stats=None):
+        self.name = name
+        self.room = f"timer:{name}"                      # Socket.IO room of its overlays
+        self.journal = journal
+        self.lock = lock or threading.Lock()
+        self.paused = paused
+        self.max_seconds = max_seconds                  # 0 = no cap
+        self._left = max(0, seconds)                   # used while paused
+        self._deadline = time.monotonic() + self._left  # used while running
+        self.version = 0                                # bumped on every change of the deadline
+        self.stats = stats or TimerStats()              # reward rollups and leaderboard
+
+    def _seconds_left(self):
+        if self.paused:
+            return self._left
+        return max(0.0, self._deadline - time.monotonic())
+
+    def _set_seconds_left(self, seconds):
+        seconds = max(0, seconds)
+        self._left = seconds
+        self._deadline = time.monotonic() + seconds
+        self.version += 1
+
+    def remaining(self):
+        """Remaining whole seconds (rounded up, like a countdown display)"""
+        return int(math.ceil(self._seconds_left()))
+
+    def add(self, seconds):
+        """
+        Add (or with a negative value remove) time, respecting max_seconds.
+        Returns the seconds actually added. Caller holds the lock.
+        """
+        left = self._seconds_left()
+        if seconds > 0 and self.max_seconds:
+            seconds = min(seconds, max(0, self.max_seconds - left))
+        self._set_seconds_left(left + seconds)
+        return seconds
+
+    def set_paused(self, value):
+        """Pause or resume. Caller holds the lock."""
+        if value == self.paused:
+            return
+        left = self._seconds_left()
+        self.paused = value
+        self._set_seconds_left(left)
+
+    def snapshot(self):
+        """State payload for clients. `ends_at` and `server_time` are epoch ms."""
+        now_wall = time.time()
+        left = self._seconds_left()
+        return {
+            "remaining": int(math.ceil(left)),
+            "paused": self.paused,
+            "ends_at": int((now_wall + left) * 1000),
+            "server_time": int(now_wall * 1000),
+        }
+
 
 # --------------------
-# Timer variables
+# Streamers, timers and state
 # --------------------
-remaining = CONFIG1["timer"]["start_minutes"] * 60
-paused = False
-lock = threading.Lock()
-
-STATE_FILE = "state.json"
 LOG_FILE = "events.log"
 TIME_ADD_LOG = "time_add.log"
 
-def save_state():
-    try:
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump({"remaining": remaining, "paused": paused}, f)
-    except Exception as e:
-        print(f"[{ts()}] [STATE] Error while saving:", e)
+# Running timers are checkpointed into the journal this often (seconds)
+CHECKPOINT_INTERVAL = int(os.getenv("STATE_CHECKPOINT_SECONDS", "10"))
+
+# Reward stats go into the journal at most this often during a hype train (seconds)
+STATS_SAVE_INTERVAL = float(os.getenv("STATS_SAVE_SECONDS", "2"))
+STATS_TOP = int(os.getenv("STATS_TOP", "10"))
+
+def state_files(timer_name):
+    """Snapshot + journal file of a timer; timer 1 keeps the classic state.json"""
+    if timer_name == "1":
+        return "state.json", "state.journal"
+    return f"state{timer_name}.json", f"state{timer_name}.journal"
+
+class Streamer:
+    """One channel: its ENV/connector settings, reward config and (maybe shared) timer"""
+
+    def __init__(self, sid, env, config, timer):
+        self.id = sid
+        self.label = env["label"]
+        self.env = env
+        self.config = config
+        self.timer = timer
+
+def observe_journal_commit(timer_name, seconds, records):
+    JOURNAL_COMMIT_SECONDS.observe(seconds, timer_name)
+
+def apply_timer_config(timer, table):
+    """Reload hook for the config owning a timer: apply the new cap"""
+    with timer.lock:
+        timer.max_seconds = table.max_seconds
+
+STREAMERS = {}   # id -> Streamer
+TIMERS = {}      # name -> SubathonTimer
+
+def setup_streamers():
+    """Load the config of every enabled streamer and create the timers"""
+    for sid in STREAMER_IDS:
+        env = streamer_env(sid)
+        # Configs are compiled into reward tables (rewards.py) and hot-reloaded on change
+        try:
+            config = RewardConfig(env["config"])
+        except FileNotFoundError:
+            if sid == STREAMER_IDS[0]:
+                raise SystemExit(f"[{ts()}] [CONFIG] {env['config']} is missing")
+            print(f"[{ts()}] [WARN] Streamer {sid} is enabled, but {env['config']} is missing!")
+            continue
+        except ConfigError as e:
+            if sid == STREAMER_IDS[0]:
+                raise SystemExit(f"[{ts()}] [CONFIG] {env['config']} is invalid: {e}")
+            print(f"[{ts()}] [WARN] {env['config']} is invalid, Streamer {sid} skipped: {e}")
+            continue
+
+        timer_name = STREAMER_IDS[0] if SHARED_TIMER else sid
+        timer = TIMERS.get(timer_name)
+        if timer is None:
+            timer = SubathonTimer(
+                timer_name,
+                config.table.start_minutes * 60,
+                max_seconds=config.table.max_seconds,
+                journal=StateJournal(*state_files(timer_name)),
+                lock=TimedLock(LOCK_WAIT_SECONDS, LOCK_HOLD_SECONDS, timer_name),
+                stats=TimerStats(top_size=STATS_TOP),
+            )
+            timer.journal.on_commit = functools.partial(observe_journal_commit, timer_name)
+            TIMERS[timer_name] = timer
+            config.on_reload = functools.partial(apply_timer_config, timer)
+        STREAMERS[sid] = Streamer(sid, env, config, timer)
+
+setup_streamers()
+DEFAULT_STREAMER = STREAMER_IDS[0]
+
+def save_state(timer, op="save"):
+    """
+    Journal the timer state. Only queues the record, the disk write happens off-thread.
+    Changed stats ride along, on rewards at most every STATS_SAVE_SECONDS. Caller holds the lock.
+    """
+    with SAVE_STATE_SECONDS.time(timer.name):
+        state = {"remaining": timer.remaining(), "paused": timer.paused}
+        stats = timer.stats
+        if stats.dirty and (op != "reward" or time.monotonic() - stats.saved_at >= STATS_SAVE_INTERVAL):
+            state["stats"] = stats.dump()
+        timer.journal.record(op, state)
+
+def save_state_on_exit(timer):
+    """Exit hook: queued rewards and stats not journaled yet go in before the journal closes"""
+    reward_batcher.flush()
+    with timer.lock:
+        save_state(timer, "exit")
 
 def load_state():
-    global remaining, paused
-    if os.path.exists(STATE_FILE):
+    # ids of applied events come back with the timers, so a reconnect replay after a restart is caught
+    dedup.load()
+    dedup.start()
+    atexit.register(dedup.close)
+    for timer in TIMERS.values():
         try:
-            with open(STATE_FILE, "r", encoding="utf-8") as f:
-                state = json.load(f)
-                remaining = state.get("remaining", remaining)
-                paused = state.get("paused", paused)
-                print(f"[{ts()}] [STATE] Restored: {remaining//60} minutes, paused={paused}")
+            state = timer.journal.load()
         except Exception as e:
-            print(f"[{ts()}] [STATE] Error while loading:", e)
+            print(f"[{ts()}] [STATE] Error while loading timer {timer.name}:", e)
+            state = None
+        if state:
+            with timer.lock:
+                timer.paused = bool(state.get("paused", timer.paused))
+                timer._set_seconds_left(state.get("remaining", timer.remaining()))
+                if state.get("stats"):
+                    timer.stats.load(state["stats"])
+            print(f"[{ts()}] [STATE] Restored timer {timer.name}: {timer.remaining()//60} minutes, paused={timer.paused}")
+        timer.journal.start()
+        atexit.register(timer.journal.close)
+        atexit.register(save_state_on_exit, timer)   # last in, first out: runs before the close
+
+log_writer = LogWriter(
+    max_queue=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+    max_bytes=int(os.getenv("LOG_MAX_MB", "50")) * 1024 * 1024,
+    rotate_daily=os.getenv("LOG_ROTATE_DAILY", "1") == "1",
+)
+
+# Every applied reward as a row, for /history queries
+history = EventStore(os.getenv("HISTORY_DB", "history.db"))
+
+# Upstream ids of applied events, so redelivered ones (reconnects) are dropped
+dedup = DedupIndex(
+    os.getenv("DEDUP_FILE", "dedup.journal"),
+    ttl=float(os.getenv("DEDUP_TTL_HOURS", "24")) * 3600,
+    max_size=int(os.getenv("DEDUP_MAX_IDS", "50000")),
+)
+
+# Recent lines for /log and /time_log, served from memory
+events_tail = LogTail(LOG_FILE, capacity=500)
+time_add_tail = LogTail(TIME_ADD_LOG, capacity=200)
 
 def log_event(platform, data):
-    """Write all RAW events additionally into a logfile"""
+    """Write all RAW events additionally into a logfile (queued, written by log_writer)"""
     try:
-        ts_str = ts()
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(f"[{ts_str}] [{platform}] RAW EVENT: {json.dumps(data, ensure_ascii=False)}\n")
+        line = f"[{ts()}] [{platform}] RAW EVENT: {jsoncodec.dumps(data)}\n"
+        events_tail.append(line)
+        log_writer.write(LOG_FILE, line)
     except Exception as e:
-        print(f"[{ts()}] [LOG] Error while writing to events.log:", e)
+        print(f"[{ts()}] [LOG] Error while queueing for events.log:", e)
+
+def write_time_add_line(line, push=True):
+    """Append one line to time_add.log and (push=True) send it to the control panels. Returns the cursor."""
+    cursor = time_add_tail.append(line)
+    log_writer.write(TIME_ADD_LOG, line)
+    if push:
+        socketio.emit("time_add", {"line": line, "cursor": cursor}, namespace=CONTROL_NAMESPACE)
+    return cursor
+
+def log_time_add(platform, minutes_to_add, remaining, label=None, streamer=None, rule=None, qty=None, push=True,
+                 applied=None):
+    """
+    Write time addition summary (same as console) to a separate logfile and the history db.
+    `applied` are the minutes actually added if max_minutes capped the reward; the history
+    row gets those. Returns (line, cursor); with push=False the caller sends the line to
+    the control panels.
+    """
+    ts_str = ts()
+    if label:
+        line = f"[{ts_str}] [{platform}] {label} | +{minutes_to_add} minutes\n"
+    else:
+        line = f"[{ts_str}] [{platform}] +{minutes_to_add} minutes\n"
+    cursor = write_time_add_line(line, push)
+    history.record(
+        ts=time.time(), streamer=streamer.id if streamer else None, connector=platform,
+        platform=rule.platform if rule else None, type=rule.kind if rule else None,
+        tier=rule.tier if rule else None, amount=qty,
+        minutes=minutes_to_add if applied is None else applied,
+        remaining=remaining, label=label,
+    )
+    return line, cursor
 
-def log_time_add(platform, minutes_to_add, remaining, label=None):
-    """Write time addition summary (same as console) to a separate logfile"""
-    try:
-        ts_str = ts()
-        if label:
-            line = f"[{ts_str}] [{platform}] {label} | +{minutes_to_add} minutes\n"
-        else:
-            line = f"[{ts_str}] [{platform}] +{minutes_to_add} minutes\n"
-        with open(TIME_ADD_LOG, "a", encoding="utf-8") as f:
-            f.write(line)
-    except Exception as e:
-        print(f"[{ts()}] [LOG] Error while writing to time_add.log:", e)
+log_writer.start()
+atexit.register(log_writer.close)
+atexit.register(history.flush)
 
+# Load existing state on startup (with several workers only the owner does, see start_owner)
+lease = OwnerLease(OWNER_LOCK_FILE, WORKER_URL) if MESSAGE_QUEUE else None
+if lease is None:
+    load_state()
 
-# Load existing state on startup
-load_state()
+def is_owner():
+    return lease is None or lease.is_owner
 
 # --------------------
 # Timer loop
 # --------------------
-def timer_loop():
-    global remaining
-    counter = 0
+# One thread for delayed jobs: broadcast and reward batch windows, gift group timeouts
+scheduler = Scheduler()
+
+# State changes within this window are merged into one timer_update per timer
+broadcaster = BroadcastCoalescer(socketio, scheduler, window=int(os.getenv("BROADCAST_WINDOW_MS", "100")) / 1000,
+                                 namespaces=("/", CONTROL_NAMESPACE))
+
+def observe_emit(timer_name, seconds, recipients):
+    EMIT_SECONDS.observe(seconds, timer_name)
+    EMIT_FANOUT.inc(timer_name, amount=recipients)
+    tracer.record("timer_update emit", {"emit": seconds}, timer=timer_name, recipients=recipients)
+
+broadcaster.on_emit = observe_emit
+
+def broadcast_state(timer, force=False):
+    """Queue a timer_update for the overlays of this timer (never called with the lock held)"""
+    broadcaster.request(timer, force)
+
+def config_watch_loop():
+    """Poll the config files and hot-swap their compiled reward tables"""
     while True:
-        with lock:
-            if not paused and remaining > 0:
-                remaining -= 1
-            socketio.emit("timer_update", {"remaining": remaining, "paused": paused})
+        socketio.sleep(CONFIG_WATCH_INTERVAL)
+        for streamer in STREAMERS.values():
+            streamer.config.reload_if_changed()
 
-            # alle 300 Sekunden (= 5 Minuten) State speichern
-            counter += 1
-            if counter >= 300:
-                save_state()
-                counter = 0
-        socketio.sleep(1)
+def timer_loop():
+    """
+    Housekeeping only: the countdowns run on their deadlines, so there is
+    no per-second broadcast. Checkpoints running timers into their journals
+    and announces once when a timer runs out.
+    """
+    expired = set()
+    while True:
+        socketio.sleep(CHECKPOINT_INTERVAL)
+        for timer in list(TIMERS.values()):
+            with timer.lock:
+                state = timer.snapshot()
+                if (not state["paused"] and timer.name not in expired) or timer.stats.dirty:
+                    save_state(timer, "tick")
+            if state["remaining"] == 0 and not state["paused"]:
+                if timer.name not in expired:
+                    broadcast_state(timer, force=True)
+                expired.add(timer.name)
+            else:
+                expired.discard(timer.name)
 
 # --------------------
 # Handle events
 # --------------------
-community_gift_groups = set()   # Gift-Bundle activityGroups
-pending_gifted_subs = {}        # ag -> {"platform":..., "tier":..., "ts":..., "config":...}
+# Wie lange auf ein communityGiftPurchase zur selben activityGroup gewartet wird
+GIFT_GROUP_WINDOW = float(os.getenv("GIFT_GROUP_WINDOW", "10"))
+
+# Gift-Bundle activityGroups, vergessen nach einer Stunde
+community_gift_groups = ExpiringSet(ttl=max(3600.0, GIFT_GROUP_WINDOW * 2))
+pending_gifted_subs = {}        # ag -> {"platform":..., "tier":..., "ts":..., "streamer":..., "keys":..., "job":...}
 
-def minutes_for_tier(cfg, tier_raw):
-    if tier_raw in ["1000", "prime"]:
-        return cfg["twitch"]["sub_t1"]
-    if tier_raw == "2000":
-        return cfg["twitch"]["sub_t2"]
-    if tier_raw == "3000":
-        return cfg["twitch"]["sub_t3"]
-    return cfg["twitch"]["sub_t1"]
+# One matched rule waiting in reward_batcher
+PendingReward = collections.namedtuple(
+    "PendingReward", ["streamer", "platform", "rule", "qty", "minutes", "user", "keys", "trace"])
+
+def apply_reward(streamer, platform, rule, qty=1, user=None, keys=()):
+    """
+    Queue the minutes for one matched rule; applied with the other rewards of this window.
+    `keys` are the dedup keys of the events behind it, persisted once the reward is journaled.
+    """
+    minutes_to_add = minutes_for(rule, qty)
+    if minutes_to_add <= 0:
+        return
+    reward_batcher.add(streamer.timer, PendingReward(streamer, platform, rule, qty, minutes_to_add, user, keys,
+                                                     tracer.hand_off()))
+
+def apply_rewards(timer, rewards):
+    """Add a batch of rewards to one timer: one lock, one journal record, one broadcast"""
+    applied = []
+    t_start = time.perf_counter()
+    with timer.lock:
+        t_locked = time.perf_counter()
+        now = time.time()
+        for r in rewards:
+            added = timer.add(r.minutes * 60)
+            applied.append((r, added, timer.remaining()))
+            timer.stats.add(r.rule.platform, r.rule.kind, int(added // 60), r.qty, r.user, now)
+        t_added = time.perf_counter()
+        save_state(timer, "reward")
+        # the events count as applied from here on, also for a redelivery after a restart
+        dedup.commit(k for r in rewards for k in r.keys)
+        stats = timer.stats.snapshot()
+        t_saved = time.perf_counter()
+    REWARD_BATCH_SIZE.observe(len(rewards), timer.name)
+
+    # Audit trail stays per event; the control panels get the lines of a batch in one time_log push
+    single = len(applied) == 1
+    lines, cursor, total_added = [], None, 0
+    for r, added, remaining in applied:
+        label = r.rule.label.format(qty=r.qty)
+        if added < r.minutes * 60:
+            label += f" (capped, +{int(added // 60)} applied)"
+        total_added += added
+        print(f"[{ts()}] [{r.platform}] {label} | +{r.minutes} minutes")
+        line, cursor = log_time_add(r.platform, r.minutes, remaining, label, r.streamer, r.rule, r.qty, push=single,
+                                    applied=int(added // 60))
+        lines.append(line)
+
+    if not single:
+        minutes = sum(r.minutes for r in rewards)
+        summary = f"Hype burst: {len(applied)} events, +{minutes} minutes"
+        if total_added < minutes * 60:
+            summary += f" (capped, +{int(total_added // 60)} applied)"
+        line = f"[{ts()}] [Timer {timer.name}] {summary}"
+        print(line)
+        lines.append(line + "\n")
+        cursor = write_time_add_line(lines[-1], push=False)
+        socketio.emit("time_log", {"lines": lines, "cursor": cursor, "reset": False}, namespace=CONTROL_NAMESPACE)
+    t_logged = time.perf_counter()
+    broadcast_state(timer)
+    socketio.emit("stats", stats, to=timer.room)
+    t_done = time.perf_counter()
+
+    for r in rewards:
+        if r.trace is None:
+            continue
+        r.trace.info["batch"] = len(rewards)
+        for stage, t in (("batch_wait", t_start), ("lock_wait", t_locked), ("apply", t_added),
+                         ("save_state", t_saved), ("audit_log", t_logged), ("broadcast", t_done)):
+            r.trace.mark(stage, t)
+        tracer.finish(r.trace)
+
+# Rewards arriving within REWARD_BATCH_MS are applied together (0 = one by one)
+reward_batcher = RewardBatcher(scheduler, functools.partial(event_profiler.call, apply_rewards),
+                               window=int(os.getenv("REWARD_BATCH_MS", "50")) / 1000)
+atexit.register(reward_batcher.flush)
 
 def check_pending_gift(activity_group):
     """
-    Wird verzögert (10s) aufgerufen.
+    Wird verzögert (GIFT_GROUP_WINDOW, Standard 10s) aufgerufen.
     Wenn bis dahin KEIN communityGiftPurchase mit derselben activityGroup registriert wurde,
     behandeln wir den gespeicherten gifted subscriber als Einzelgift.
     """
@@ -168,34 +574,33 @@ def check_pending_gift(activity_group):
 
     # Wenn die Group inzwischen als Bundle markiert wurde -> ignorieren
     if activity_group in community_gift_groups:
+        dedup.commit(info["keys"])  # done: redelivered after a restart they must not count alone
         return
 
-    platform = info["platform"]
-    tier_raw = info["tier"]
-    cfg = info["config"]
-    add_min = minutes_for_tier(cfg, tier_raw)
-
-    with lock:
-        global remaining
-        remaining += add_min * 60
-        save_state()
-        new_state = {"remaining": remaining, "paused": paused}
-    label = "Gifted Sub"
-    msg = f"[{ts()}] [{platform}] {label} | +{add_min} minutes"
-    print(msg)
-    log_time_add(platform, add_min, remaining, label)
-    socketio.start_background_task(socketio.emit, "timer_update", new_state)
-
-def handle_event(platform, data, config):
-    global remaining, community_gift_groups, pending_gifted_subs
-    minutes_to_add = 0
+    streamer = info["streamer"]
+    rule = streamer.config.table.rule("twitch", "gifted_sub", info["tier"])
+    if rule:
+        apply_reward(streamer, info["platform"], rule, user=info.get("user"), keys=info["keys"])
+
+def supporter(data):
+    """Display name of whoever paid for a StreamElements event (gifts: the gifter)"""
+    d = data.get("data", {})
+    return d.get("displayName") or d.get("username") or None
 
+def handle_event(platform, data, streamer, key=None):
     # RAW event to logfile + optional console
     if DEBUG_EVENTS:
-        print(f"[{ts()}] [{platform}] RAW EVENT: {json.dumps(data, indent=2)}")
+        print(f"[{ts()}] [{platform}] RAW EVENT: {jsoncodec.dumps(data, indent=True)}")
+        tracer.mark("debug_print")
     log_event(platform, data)
+    tracer.mark("log_event")
 
+    table = streamer.config.table  # one table per event, even if a reload swaps it meanwhile
     etype = data.get("type")
+    rule = None
+    qty = 1
+    user = None
+    keys = (key,) if key else ()
 
     # Twitch/Kick subs via StreamElements
     if etype == "subscriber":
@@ -204,320 +609,621 @@ def handle_event(platform, data, config):
         tier_raw = str(d.get("tier", "1000")).lower()
         gifted = d.get("gifted", False)
         ag = data.get("activityGroup")
+        kind = "gifted_sub" if gifted else "sub"
+        user = d.get("sender") if gifted else supporter(data)
 
         # --- Kick subs ---
         if "kick" in provider or "kick" in platform.lower():
-            if "kick" in config:
-                minutes_to_add = config["kick"]["sub"]
+            rule = table.rule("kick", kind, tier_raw)
 
         # --- Twitch subs ---
         else:
-            if gifted:
-                # Falls SE eine activityGroup mitliefert, warten wir 10s ab,
+            if gifted and ag:
+                # Falls SE eine activityGroup mitliefert, warten wir GIFT_GROUP_WINDOW ab,
                 # ob ein communityGiftPurchase mit derselben Group kommt.
-                if ag:
-                    pending_gifted_subs[ag] = {
-                        "platform": platform,
-                        "tier": tier_raw,
-                        "ts": time.time(),
-                        "config": config
-                    }
-                    threading.Timer(10.0, check_pending_gift, args=(ag,)).start()
+                pending = pending_gifted_subs.get(ag)
+                if pending:
+                    # weiterer Gift derselben Group: Job läuft bereits
+                    pending.update(platform=platform, tier=tier_raw, streamer=streamer, user=user)
+                    pending["keys"] += keys
                     return
-                else:
-                    # selten, aber falls kein ag vorhanden -> sofort als Einzelgift zählen
-                    minutes_to_add = minutes_for_tier(config, tier_raw)
-            else:
-                # normaler Sub / Resub
-                minutes_to_add = minutes_for_tier(config, tier_raw)
+                pending_gifted_subs[ag] = {
+                    "platform": platform,
+                    "tier": tier_raw,
+                    "ts": time.time(),
+                    "streamer": streamer,
+                    "user": user,
+                    "keys": keys,
+                    "job": scheduler.call_later(
+                        GIFT_GROUP_WINDOW, ingest.submit_internal,
+                        platform, "gift_timeout", {"activityGroup": ag}),
+                }
+                return
+            # normaler Sub / Resub, oder Gift ohne ag -> sofort als Einzelgift zählen
+            rule = table.rule("twitch", kind, tier_raw)
 
     # Gifted subs (Bundle)
     elif etype == "communityGiftPurchase":
         d = data.get("data", {})
-        gift_amount = int(d.get("amount", 1))
+        qty = int(d.get("amount", 1))
         tier_raw = str(d.get("tier", "1000")).lower()
         ag = data.get("activityGroup")
+        user = supporter(data)
 
         # Group als Bundle markieren
         if ag:
             community_gift_groups.add(ag)
             # ggf. wartenden gifted-sub-Eintrag entfernen (falls bereits pending)
-            pending_gifted_subs.pop(ag, None)
+            pending = pending_gifted_subs.pop(ag, None)
+            if pending:
+                scheduler.cancel(pending["job"])
+                dedup.commit(pending["keys"])
 
-        minutes_to_add = gift_amount * minutes_for_tier(config, tier_raw)
+        rule = table.rule("twitch", "gift_bundle", tier_raw)
 
     # Bits
     elif etype == "cheer":
-        bits = int(data.get("data", {}).get("amount", 0))
-        minutes_to_add = (bits // 100) * config["twitch"]["bits_per_100"]
+        qty = int(data.get("data", {}).get("amount", 0))
+        user = supporter(data)
+        rule = table.rule("twitch", "cheer")
 
     # Donations via Tipeee
-    elif etype == "donation" and "tipeee" in config:
-        amount = float(data.get("amount", 0))
-        minutes_to_add = int(amount * config["tipeee"]["minutes_per_eur"])
+    elif etype == "donation":
+        qty = float(data.get("amount", 0))
+        user = data.get("user")
+        rule = table.rule("tipeee", "donation")
 
     # Donations via StreamElements
-    elif etype == "tip" and "streamelements" in config:
-        amount = float(data.get("data", {}).get("amount", 0))
-        minutes_to_add = int(amount * config["streamelements"]["minutes_per_eur"])
+    elif etype == "tip":
+        qty = float(data.get("data", {}).get("amount", 0))
+        user = supporter(data)
+        rule = table.rule("streamelements", "tip")
 
     # Kick gifts via Chat
     elif etype == "kick_gift":
-        if "kick" in config:
-            amount = int(data.get("amount", 0))
-            minutes_to_add = (amount // 100) * config["kick"]["kicks_per_100"]
+        qty = int(data.get("amount", 0))
+        user = data.get("user")
+        rule = table.rule("kick", "kick_gift")
+    tracer.mark("match")
 
     # --- Apply time addition ---
-    if minutes_to_add > 0:
-        # passendes Label bestimmen
-        label = ""
-        if etype == "subscriber":
-            if gifted:
-                label = "Gifted Sub"
-            else:
-                if tier_raw == "1000" or tier_raw == "prime":
-                    label = "T1 Sub"
-                elif tier_raw == "2000":
-                    label = "T2 Sub"
-                elif tier_raw == "3000":
-                    label = "T3 Sub"
-                else:
-                    label = "Sub"
-        elif etype == "communityGiftPurchase":
-            label = f"Gift Bundle ({gift_amount} Subs)"
-        elif etype == "cheer":
-            label = f"Bits ({bits})"
-        elif etype == "donation":
-            label = f"Donation ({amount:.2f} €)"
-        elif etype == "tip":
-            label = f"Tip ({amount:.2f} €)"
-        elif etype == "kick_gift":
-            label = f"Kick Gift ({amount})"
+    if rule:
+        apply_reward(streamer, platform, rule, qty, user, keys)
+
+
+# --------------------
+# Event ingestion
+# --------------------
+def apply_envelope(env):
+    """Worker side of the ingestion queue: the only place rewards are applied"""
+    trace = tracer.begin(f"{env.source} {env.type}")
+    trace.add("queue", time.monotonic() - env.received)
+    key = None if env.type == "gift_timeout" else event_key(env.source, env.data)
+    if env.type != "gift_timeout" and dedup.seen(key):
+        EVENTS_DUPLICATE.inc(env.source, env.type)
+        print(f"[{ts()}] [{env.source}] Duplicate {env.type} dropped (already applied)")
+        trace.mark("dedup")
+        tracer.finish(trace)
+        return
+    trace.mark("dedup")
+    with HANDLE_EVENT_SECONDS.time(env.type):
+        if env.type == "gift_timeout":
+            event_profiler.call(check_pending_gift, env.data["activityGroup"])
         else:
-            label = etype.capitalize()
+            event_profiler.call(handle_event, env.source, env.data, env.streamer, key)
+    EVENTS_APPLIED.inc(env.source, env.type)
+    if not trace.handed_off:    # no reward: done here, otherwise apply_rewards finishes it
+        trace.mark("other")
+        tracer.finish(trace)
 
-        with lock:
-            remaining += minutes_to_add * 60
-            save_state()
-            new_state = {"remaining": remaining, "paused": paused}
+ingest = IngestQueue(
+    apply_envelope,
+    maxsize=int(os.getenv("INGEST_QUEUE_SIZE", "10000")),
+    policy=os.getenv("INGEST_OVERFLOW", "block"),
+)
 
-        msg = f"[{ts()}] [{platform}] {label} | +{minutes_to_add} minutes"
-        print(msg)
-        log_time_add(platform, minutes_to_add, remaining, label)
-        socketio.start_background_task(socketio.emit, "timer_update", new_state)
+def submit_event(source, data, streamer):
+    """Called by all connectors: hand the event to the worker and return immediately"""
+    EVENTS_RECEIVED.inc(source, data.get("type"))
+    return ingest.submit(source, data.get("type"), data, streamer)
 
 
 # --------------------
-# StreamElements WS with auto-reconnect
+# Connectors (reconnects are handled by the supervisor)
 # --------------------
-def start_client(name, token, config):
-    url = "wss://astro.streamelements.com"
+supervisor = Supervisor(
+    base_delay=float(os.getenv("RECONNECT_BASE_SECONDS", "1")),
+    max_delay=float(os.getenv("RECONNECT_MAX_SECONDS", "60")),
+)
 
-    def run_ws():
+# --------------------
+# StreamElements WS
+# --------------------
+def start_client(name, token, streamer):
+    url = SE_WS_URL
+
+    def subscribe(ws, topic, token, name):
+        sub = {
+            "type": "subscribe",
+            "nonce": str(uuid.uuid4()),
+            "data": {"topic": topic, "token": token, "token_type": "jwt"},
+        }
+        ws.send(jsoncodec.dumps(sub))
+        print(f"[{ts()}] [{name}] Subscribed to {topic}")
+
+    def run_once(conn):
         def on_open(ws):
+            conn.mark_connected()
             print(f"[{ts()}] [{name}] Connected")
 
         def on_message(ws, message):
-            msg = json.loads(message)
+            conn.mark_message()
+            msg = jsoncodec.loads(message)
             if msg.get("type") == "welcome":
                 subscribe(ws, "channel.activities", token, name)
             elif msg.get("type") == "message":
                 data = msg.get("data")
-                handle_event(name, data, config)
+                submit_event(name, data, streamer)
 
         def on_error(ws, error):
+            conn.mark_error(error)
             print(f"[{ts()}] [{name}] Error: {error}")
 
-        def on_close(ws, close_status_code, close_msg):
-            print(f"[{ts()}] [{name}] Connection closed, reconnecting in 1s")
-            time.sleep(1)
-            run_ws()
-
-        def subscribe(ws, topic, token, name):
-            sub = {
-                "type": "subscribe",
-                "nonce": str(uuid.uuid4()),
-                "data": {"topic": topic, "token": token, "token_type": "jwt"},
-            }
-            ws.send(json.dumps(sub))
-            print(f"[{ts()}] [{name}] Subscribed to {topic}")
-
         ws = websocket.WebSocketApp(
             url,
             on_open=on_open,
             on_message=on_message,
             on_error=on_error,
-            on_close=on_close,
         )
         ws.run_forever()
 
-    threading.Thread(target=run_ws, daemon=True).start()
+    supervisor.add(name, "streamelements", run_once)
 
 # --------------------
 # Kick Chat Listener (for Kick Gifts via Chat)
 # --------------------
-def connect_kick_chat(name, app_key, cluster, chatroom_id, config):
+# Only chat lines matching KICK_GIFT_RE add time; the hint is the cheap pre-check on the raw frame
+KICK_GIFT_HINT = re.compile(r"gifted", re.IGNORECASE)
+KICK_GIFT_RE = re.compile(r"gifted\s+(\d+)\s+KICK", re.IGNORECASE)
+# Share of ordinary chat messages written to events.log (0 = none, 1 = all)
+KICK_CHAT_SAMPLE_RATE = min(1.0, max(0.0, float(os.getenv("KICK_CHAT_SAMPLE_RATE", "0"))))
+
+def log_kick_chat(name, message, sampled=False):
+    """Decode a ChatMessageEvent frame and log its payload; returns the chat message or None"""
+    try:
+        payload = jsoncodec.loads(message)
+        if payload.get("event") != "App\\Events\\ChatMessageEvent":
+            return None
+        inner = jsoncodec.loads(payload["data"])
+    except Exception as e:
+        print(f"[{ts()}] [{name}] KickChat parse error:", e)
+        return None
+    if sampled:
+        KICK_CHAT_SAMPLED.inc(name)
+    if DEBUG_EVENTS:
+        print(f"[{ts()}] [{name}] RAW CHAT EVENT: {jsoncodec.dumps(inner, indent=True)}")
+    log_event(name, inner)
+    return inner
+
+def handle_kick_chat(name, message, streamer):
+    """One raw Pusher frame of the chat socket: submit a kick_gift for gift messages"""
+    KICK_CHAT_SEEN.inc(name)
+    # Fast path: without "gifted" in the raw frame it can only be ordinary chat
+    # (or a Pusher control frame), so it is dropped or sampled without decoding
+    if not KICK_GIFT_HINT.search(message):
+        if KICK_CHAT_SAMPLE_RATE and random.random() < KICK_CHAT_SAMPLE_RATE:
+            log_kick_chat(name, message, sampled=True)
+        return
+    inner = log_kick_chat(name, message)
+    if inner is None:
+        return
+    m = KICK_GIFT_RE.search(inner.get("content", ""))
+    if m:
+        KICK_CHAT_MATCHED.inc(name)
+        amount = int(m.group(1))
+        # the chat message is logged with its id as well: own namespace, or a replay
+        # of events.log would take the logged message for the gift and drop the gift
+        msg_id = inner.get("id")
+        fake_event = {"type": "kick_gift", "amount": amount, "id": f"kick_gift:{msg_id}" if msg_id else None,
+                      "user": (inner.get("sender") or {}).get("username")}
+        submit_event(name, fake_event, streamer)
+
+def connect_kick_chat(name, app_key, cluster, chatroom_id, streamer):
     if not app_key or not cluster or not chatroom_id:
         print(f"[{ts()}] [INFO] KickChat for {name} skipped (missing ENV)")
         return
 
-    url = f"wss://ws-{cluster}.pusher.com/app/{app_key}?protocol=7"
+    url = KICK_WS_URL.format(cluster=cluster, app_key=app_key)
 
-    def on_open(ws):
-        print(f"[{ts()}] [{name}] KickChat connected")
-        ws.send(json.dumps({
-            "event": "pusher:subscribe",
-            "data": {"channel": f"chatrooms.{chatroom_id}.v2"}
-        }))
+    def run_once(conn):
+        def on_open(ws):
+            conn.mark_connected()
+            print(f"[{ts()}] [{name}] KickChat connected")
+            ws.send(jsoncodec.dumps({
+                "event": "pusher:subscribe",
+                "data": {"channel": f"chatrooms.{chatroom_id}.v2"}
+            }))
 
-    def on_message(ws, message):
-        try:
-            payload = json.loads(message)
-            if payload.get("event") == "App\\Events\\ChatMessageEvent":
-                inner = json.loads(payload["data"])
-                text = inner.get("content", "")
-                if DEBUG_EVENTS:
-                    print(f"[{ts()}] [{name}] RAW CHAT EVENT: {json.dumps(inner, indent=2)}")
-                log_event(name, inner)
-                m = re.search(r"gifted\s+(\d+)\s+KICK", text, re.IGNORECASE)
-                if m:
-                    amount = int(m.group(1))
-                    fake_event = {"type": "kick_gift", "amount": amount}
-                    handle_event(name, fake_event, config)
-        except Exception as e:
-            print(f"[{ts()}] [{name}] KickChat parse error:", e)
-
-    def on_close(ws, *a):
-        print(f"[{ts()}] [{name}] KickChat closed, reconnect in 5s")
-        time.sleep(2)
-        connect_kick_chat(name, app_key, cluster, chatroom_id, config)
-
-    def on_error(ws, error):
-        print(f"[{ts()}] [{name}] KickChat error:", error)
-
-    ws = websocket.WebSocketApp(
-        url,
-        on_open=on_open,
-        on_message=on_message,
-        on_close=on_close,
-        on_error=on_error
-    )
-    threading.Thread(target=ws.run_forever, daemon=True).start()
+        def on_message(ws, message):
+            conn.mark_message()
+            handle_kick_chat(name, message, streamer)
+
+        def on_error(ws, error):
+            conn.mark_error(error)
+            print(f"[{ts()}] [{name}] KickChat error:", error)
+
+        ws = websocket.WebSocketApp(
+            url,
+            on_open=on_open,
+            on_message=on_message,
+            on_error=on_error
+        )
+        ws.run_forever()
+
+    supervisor.add(name, "kick_chat", run_once)
 
 # --------------------
 # TipeeeStream (donations only)
 # --------------------
-def start_tipeee(name, api_key, config):
+def handle_tipeee_event(name, data, streamer):
+    """One "new-event" of the Tipeee socket: log donations and submit them"""
+    try:
+        ev = data.get("event", {})
+        if ev.get("type") == "donation":
+            params = ev.get("parameters", {}) if isinstance(ev.get("parameters", {}), dict) else {}
+            amount = float(params.get("amount", 0))
+            user = params.get("username", "Unknown")
+            if DEBUG_EVENTS:
+                print(f"[{ts()}] [{name}] RAW TIPEEE EVENT: {jsoncodec.dumps(ev, indent=True)}")
+            log_event(name, ev)
+            # own id namespace, the raw event above is logged with the same id (see handle_kick_chat)
+            ev_id = ev.get("id")
+            fake = {"type": "donation", "amount": amount, "user": user, "id": f"donation:{ev_id}" if ev_id else None}
+            submit_event(name, fake, streamer)
+    except Exception as e:
+        print(f"[{ts()}] [{name}] Tipeee parse error:", e)
+
+def start_tipeee(name, api_key, streamer):
     if not api_key:
         print(f"[{ts()}] [INFO] {name} skipped (no TIPEEE_API_KEY)")
         return
 
-    sio = socketio_client.Client(reconnection=True)
+    def run_once(conn):
+        sio = socketio_client.Client(reconnection=False)
 
-    @sio.event
-    def connect():
-        print(f"[{ts()}] [{name}] Connected to Tipeee -> listening for donations")
+        @sio.event
+        def connect():
+            conn.mark_connected()
+            print(f"[{ts()}] [{name}] Connected to Tipeee -> listening for donations")
 
+        @sio.event
+        def disconnect():
+            print(f"[{ts()}] [{name}] Disconnected from Tipeee")
 
-    @sio.event
-    def disconnect():
-        print(f"[{ts()}] [{name}] Disconnected from Tipeee")
+        @sio.on("new-event")
+        def on_new_event(data):
+            conn.mark_message()
+            handle_tipeee_event(name, data, streamer)
 
-    @sio.on("new-event")
-    def on_new_event(data):
-        try:
-            ev = data.get("event", {})
-            if ev.get("type") == "donation":
-                params = ev.get("parameters", {}) if isinstance(ev.get("parameters", {}), dict) else {}
-                amount = float(params.get("amount", 0))
-                user = params.get("username", "Unknown")
-                if DEBUG_EVENTS:
-                    print(f"[{ts()}] [{name}] RAW TIPEEE EVENT: {json.dumps(ev, indent=2)}")
-                log_event(name, ev)
-                fake = {"type": "donation", "amount": amount, "user": user}
-                handle_event(name, fake, config)
-        except Exception as e:
-            print(f"[{ts()}] [{name}] Tipeee parse error:", e)
-
-    def run():
-        url = f"https://sso.tipeeestream.com:443?access_token={api_key}"
+        url = f"{TIPEEE_URL}?access_token={api_key}"
         try:
             sio.connect(url, transports=["websocket", "polling"])
             sio.wait()
-        except Exception as e:
-            print(f"[{ts()}] [{name}] Tipeee connection error:", e)
-            time.sleep(1)
-            run()
-
-    threading.Thread(target=run, daemon=True).start()
+        finally:
+            sio.disconnect()
+
+    supervisor.add(name, "tipeee", run_once)
+
+def start_connectors(streamer):
+    env = streamer.env
+    label = streamer.label
+    if env["se_twitch_token"]:
+        start_client(f"{label}-Twitch", env["se_twitch_token"], streamer)
+    if env["se_kick_token"]:
+        start_client(f"{label}-Kick", env["se_kick_token"], streamer)
+    connect_kick_chat(f"{label}-KickChat", env["kick_app_key"], env["kick_cluster"], env["kick_chatroom_id"], streamer)
+    if env["tipeee_api_key"]:
+        start_tipeee(f"{label}-Tipeee", env["tipeee_api_key"], streamer)
 
 # --------------------
 # Flask routes
 # --------------------
-@app.route("/")
-def index():
-    return "Subathon timer is running!"
+def request_streamer():
+    """Streamer selected with ?streamer=<id> (default: the first one), or None"""
+    return STREAMERS.get(request.args.get("streamer", DEFAULT_STREAMER))
+
+def streamer_missing():
+    return jsonify({"error": "Streamer not available"}), 400
+
+# --------------------
+# Forwarding to the timer owner (several workers)
+# --------------------
+FORWARD_HEADERS = ("Content-Type", "ETag", "Cache-Control")
+
+def owner_request(path, headers=None):
+    """GET `path` from the owner worker; returns (status, body, headers)"""
+    url = lease.owner_url()
+    if not url:
+        raise ConnectionError("no timer owner yet")
+    req = urllib.request.Request(url + path, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return resp.status, resp.read(), resp.headers
+    except urllib.error.HTTPError as e:
+        return e.code, e.read(), e.headers
+
+def owner_route(view):
+    """Timer reads and mutations are served by the owner, other workers forward the request"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if is_owner():
+            return view(*args, **kwargs)
+        headers = {"If-None-Match": request.headers["If-None-Match"]} if "If-None-Match" in request.headers else {}
+        try:
+            status, body, resp_headers = owner_request(request.full_path, headers)
+        except (OSError, ConnectionError) as e:
+            return jsonify({"error": f"timer owner not available: {e}"}), 503
+        resp = make_response(body, status)
+        for name in FORWARD_HEADERS:
+            if name in resp_headers:
+                resp.headers[name] = resp_headers[name]
+        return resp
+    return wrapper
+
+@socketio.on("connect")
+def on_connect(auth=None):
+    """Overlays connect with ?streamer=<id> and only get that timer's updates"""
+    streamer = request_streamer()
+    if streamer is None:
+        return False
+    join_room(streamer.timer.room)
+
+@socketio.on("connect", namespace=CONTROL_NAMESPACE)
+def on_control_connect(auth=None):
+    """
+    Control panels get the timer state, then the time additions they missed:
+    auth {"since": <cursor>} (the cursor of the last record they saw) resumes,
+    without it they get the last 10 lines. After that every change is pushed.
+    """
+    streamer = request_streamer()
+    if streamer is None:
+        return False
+    # join first, so a record added meanwhile comes twice rather than never (clients skip by cursor)
+    join_room(streamer.timer.room)
+    since = auth.get("since") if isinstance(auth, dict) else None
+    limit = 10 if not since else 200
+
+    if not is_owner():
+        try:
+            _, state, _ = owner_request(f"/state?streamer={streamer.id}")
+            _, log, _ = owner_request(f"/time_log?limit={limit}" + (f"&since={since}" if since else ""))
+            emit("state", jsoncodec.loads(state))
+            emit("time_log", jsoncodec.loads(log))
+        except (OSError, ConnectionError, ValueError) as e:
+            print(f"[{ts()}] [LEASE] Control panel connected, owner not reachable:", e)
+        return
+
+    with streamer.timer.lock:
+        state = streamer.timer.snapshot()
+    emit("state", state)
+    lines, cursor, reset = time_add_tail.read(limit, since)
+    if reset and not lines:
+        lines = ["(no time additions yet)\n"]
+    emit("time_log", {"lines": lines, "cursor": cursor, "reset": reset})
+
+@app.route("/streamers")
+def list_streamers():
+    return jsonify([
+        {"id": s.id, "label": s.label, "timer": s.timer.name}
+        for s in STREAMERS.values()
+    ])
 
 @app.route("/rewards")
 def rewards():
-    streamer = request.args.get("streamer", "1")
-    if streamer == "1":
-        cfg = CONFIG1
-    elif streamer == "2" and CONFIG2:
-        cfg = CONFIG2
+    streamer = request_streamer()
+    if streamer is None:
+        return streamer_missing()
+
+    # pre-serialized when the config was compiled
+    return app.response_class(streamer.config.table.rewards_json, mimetype="application/json")
+
+# --------------------
+# Debug endpoints (DEBUG_ENDPOINTS=1)
+# --------------------
+def debug_route(view):
+    """404 unless DEBUG_ENDPOINTS=1; with DEBUG_TOKEN set, ?token= (or X-Debug-Token) must match"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not DEBUG_ENDPOINTS:
+            return jsonify({"error": "debug endpoints are disabled (DEBUG_ENDPOINTS=1)"}), 404
+        given = request.args.get("token") or request.headers.get("X-Debug-Token", "")
+        if DEBUG_TOKEN and not hmac.compare_digest(given, DEBUG_TOKEN):
+            return jsonify({"error": "invalid debug token"}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route("/debug/profile")
+@debug_route
+def get_debug_profile():
+    """
+    ?seconds=N (default 10, max 120). mode=cprofile (default) profiles the
+    event path; format=text (pstats table, ?sort=, ?limit=) or pstats (file
+    for snakeviz). mode=sample samples every thread (?interval_ms=, default 5)
+    and returns collapsed stacks for flamegraph.pl / speedscope.
+    """
+    try:
+        seconds = min(max(float(request.args.get("seconds", "10")), 0.1), 120.0)
+        interval = max(float(request.args.get("interval_ms", "5")), 1.0) / 1000
+        limit = int(request.args.get("limit", "60"))
+    except ValueError:
+        return jsonify({"error": "seconds, interval_ms and limit must be numbers"}), 400
+    mode = request.args.get("mode", "cprofile")
+    print(f"[{ts()}] [DEBUG] {mode} capture for {seconds:g}s")
+
+    if mode == "sample":
+        return app.response_class(sample_stacks(seconds, interval, socketio.sleep), mimetype="text/plain")
+    if mode != "cprofile":
+        return jsonify({"error": "mode must be cprofile or sample"}), 400
+    try:
+        stats = event_profiler.capture(seconds, socketio.sleep)
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    if stats is None:
+        return app.response_class(f"no events in {seconds:g}s\n", mimetype="text/plain")
+    if request.args.get("format") == "pstats":
+        resp = app.response_class(stats_dump(stats), mimetype="application/octet-stream")
+        resp.headers["Content-Disposition"] = "attachment; filename=events.pstats"
+        return resp
+    try:
+        text = stats_text(stats, request.args.get("sort", "cumulative"), limit)
+    except KeyError as e:
+        return jsonify({"error": f"unknown sort key {e}"}), 400
+    return app.response_class(text, mimetype="text/plain")
+
+@app.route("/debug/slowest")
+@debug_route
+def get_debug_slowest():
+    """The slowest events (and emits) with their per-stage spans; ?reset=1 starts over"""
+    body = {"kept": tracer.keep, "traced": tracer.finished, "slowest": tracer.slowest()}
+    if request.args.get("reset") == "1":
+        tracer.reset()
+    return jsonify(body)
+
+# --------------------
+# Overlay pages + assets (served from memory, see assets.py)
+# --------------------
+assets = AssetStore(os.path.dirname(os.path.abspath(__file__)))
+
+def asset_response(path):
+    """
+    Pages are revalidated (no-cache + ETag), files requested with the
+    ?v=<hash> the page put on them are cached as immutable. Bodies are
+    precompressed, so the encoding is only picked, never computed.
+    """
+    asset = assets.get(path, PUBLIC_URL or request.host_url.rstrip("/"))
+    if asset is None:
+        if path in ASSET_FALLBACKS:
+            return redirect(ASSET_FALLBACKS[path])
+        return jsonify({"error": f"{path} not found"}), 404
+
+    if asset.br is not None and request.accept_encodings["br"]:
+        body, encoding, etag = asset.br, "br", asset.etag + "-br"
+    elif asset.gzip is not None and request.accept_encodings["gzip"]:
+        body, encoding, etag = asset.gzip, "gzip", asset.etag + "-gz"
+    else:
+        body, encoding, etag = asset.body, None, asset.etag
+    if request.args.get("v") == asset.etag:
+        cache = "public, max-age=31536000, immutable"
     else:
-        return jsonify({"error": "Streamer not available"}), 400
+        cache = "no-cache"
 
-    rewards_list = [
-        {"name": "T 1 Sub", "minutes": cfg["twitch"]["sub_t1"]},
-        {"name": "T 2 Sub", "minutes": cfg["twitch"]["sub_t2"]},
-        {"name": "T 3 Sub", "minutes": cfg["twitch"]["sub_t3"]},
-        {"name": "100 Bits", "minutes": cfg["twitch"]["bits_per_100"]},
-    ]
+    if any(request.if_none_match.contains(e) for e in (asset.etag, asset.etag + "-br", asset.etag + "-gz")):
+        resp = make_response("", 304)
+    else:
+        resp = app.response_class(body, mimetype=asset.mimetype)
+        if encoding:
+            resp.headers["Content-Encoding"] = encoding
+    resp.headers["ETag"] = f'"{etag}"'
+    resp.headers["Cache-Control"] = cache
+    resp.headers["Vary"] = "Accept-Encoding"
+    return resp
+
+@app.route("/")
+def get_index_page():
+    return asset_response("index.html")
 
-    if "tipeee" in cfg:
-        rewards_list.append({"name": "1 € Donation", "minutes": cfg["tipeee"]["minutes_per_eur"]})
+@app.route("/<page>.html")
+def get_page(page):
+    return asset_response(page + ".html")
 
-    if "streamelements" in cfg:
-        rewards_list.append({"name": "1 € Donation", "minutes": cfg["streamelements"]["minutes_per_eur"]})
+@app.route("/fonts/<path:name>")
+def get_font(name):
+    return asset_response("fonts/" + name)
 
-    if "kick" in cfg:
-        rewards_list.append({"name": "Kick Sub", "minutes": cfg["kick"]["sub"]})
-        rewards_list.append({"name": "100 Kicks", "minutes": cfg["kick"]["kicks_per_100"]})
+@app.route("/vendor/<path:name>")
+def get_vendor(name):
+    return asset_response("vendor/" + name)
 
-    return jsonify(rewards_list)
+# Per timer: (version, paused, ends_at, remaining, serialized head of the /state body)
+state_cache = {}
 
 @app.route("/state")
+@owner_route
 def get_state():
-    return jsonify({"remaining": remaining, "paused": paused})
+    """
+    Served from a per-timer cache that is rebuilt only when the timer
+    changed, so a poll does not touch the timer lock. Not cacheable by the
+    client: `server_time` is the clock the overlays take their offset from,
+    a revalidated copy of an old body would shift their countdown.
+    """
+    streamer = request_streamer()
+    if streamer is None:
+        return streamer_missing()
+    timer = streamer.timer
+
+    cached = state_cache.get(timer.name)
+    if cached is None or cached[0] != timer.version:
+        with timer.lock:
+            version = timer.version
+            state = timer.snapshot()
+        head = jsoncodec.dumps({"paused": state["paused"], "ends_at": state["ends_at"]})[:-1]
+        cached = (version, state["paused"], state["ends_at"], state["remaining"], head)
+        state_cache[timer.name] = cached
+    version, paused, ends_at, remaining, head = cached
+
+    # only the countdown and the clock change between versions
+    now_ms = int(time.time() * 1000)
+    if not paused:
+        remaining = max(0, math.ceil((ends_at - now_ms) / 1000))
+    resp = app.response_class(f'{head},"remaining":{remaining},"server_time":{now_ms}}}',
+                              mimetype="application/json")
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+@app.route("/stats")
+@owner_route
+def get_stats():
+    """Reward totals, hourly/daily rollups and the leaderboard of the streamer's timer"""
+    streamer = request_streamer()
+    if streamer is None:
+        return streamer_missing()
+    with streamer.timer.lock:
+        stats = streamer.timer.stats.snapshot(history=True)
+    return jsonify(stats)
+
+def set_paused(value):
+    streamer = request_streamer()
+    if streamer is None:
+        return streamer_missing()
+    timer = streamer.timer
+    with timer.lock:
+        timer.set_paused(not timer.paused if value is None else value)
+        save_state(timer, "pause" if timer.paused else "resume")
+        state = timer.snapshot()
+    broadcast_state(timer)
+    return jsonify(state)
 
 @app.route("/pause")
+@owner_route
 def pause_timer():
-    global paused
-    with lock:
-        paused = True
-        save_state()
-    return jsonify({"remaining": remaining, "paused": paused})
+    return set_paused(True)
 
 @app.route("/resume")
+@owner_route
 def resume_timer():
-    global paused
-    with lock:
-        paused = False
-        save_state()
-    return jsonify({"remaining": remaining, "paused": paused})
+    return set_paused(False)
 
 @app.route("/toggle")
+@owner_route
 def toggle_timer():
-    global paused
-    with lock:
-        paused = not paused
-        save_state()
-    return jsonify({"remaining": remaining, "paused": paused})
+    return set_paused(None)
 
 @app.route("/time")
+@owner_route
 def change_time():
-    global remaining
+    streamer = request_streamer()
+    if streamer is None:
+        return streamer_missing()
     delta_str = request.args.get("delta")
     minusdelta_str = request.args.get("minusdelta")
 
@@ -536,65 +1242,181 @@ def change_time():
     except ValueError:
         return jsonify({"error": "delta/minusdelta must be a number"}), 400
 
-    with lock:
-        remaining = max(0, remaining + delta * 60)
-        save_state()
-        new_state = {"remaining": remaining, "paused": paused}
+    timer = streamer.timer
+    with timer.lock:
+        timer.add(delta * 60)
+        save_state(timer, "manual")
+        new_state = timer.snapshot()
 
-    socketio.start_background_task(socketio.emit, "timer_update", new_state)
-    print(f"[{ts()}] [MANUAL] {delta:+} minutes -> {remaining//60} min total")
+    broadcast_state(timer)
+    print(f"[{ts()}] [MANUAL] [{streamer.label}] {delta:+} minutes -> {new_state['remaining']//60} min total")
 
     return jsonify(new_state)
 
+def tail_response(tail, default_limit, empty_text):
+    """
+    Recent lines from a LogTail. `?since=<cursor>` returns only newer lines,
+    `?limit=N` caps the count. The cursor doubles as ETag, so an unchanged
+    log answers 304.
+    """
+    since = request.args.get("since")
+    try:
+        limit = min(int(request.args.get("limit", default_limit)), 1000)
+    except ValueError:
+        return jsonify({"error": "limit must be a number"}), 400
+
+    etag = f"{tail.cursor()}-{limit}-{since or ''}"
+    if request.if_none_match.contains(etag):
+        return "", 304
+
+    lines, cursor, reset = tail.read(limit, since)
+    if reset and not lines:
+        lines = [empty_text]
+    resp = make_response(jsonify({"lines": lines, "cursor": cursor, "reset": reset}))
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+def overlay_clients():
+    rooms = socketio.server.manager.rooms.get("/", {})
+    return {(t.name,): len(rooms.get(t.room, {})) for t in TIMERS.values()}
+
+METRICS.gauge("subathon_overlay_clients", "Connected Socket.IO clients per timer room",
+              overlay_clients, ("timer",))
+METRICS.gauge("subathon_connector_reconnects_total", "Reconnects per connector",
+              lambda: {(c.name,): c.reconnects for c in supervisor.connectors}, ("connector",), kind="counter")
+METRICS.gauge("subathon_connector_up", "1 if the connector is connected",
+              lambda: {(c.name,): int(c.state == "connected") for c in supervisor.connectors}, ("connector",))
+METRICS.gauge("subathon_ingest_queue_depth", "Events waiting in the ingestion queue", lambda: ingest.stats()["depth"])
+METRICS.gauge("subathon_ingest_dropped_total", "Events dropped by the ingestion queue",
+              lambda: ingest.dropped, kind="counter")
+METRICS.gauge("subathon_log_dropped_total", "Log lines dropped by the log writer",
+              lambda: log_writer.dropped_total, kind="counter")
+METRICS.gauge("subathon_timer_remaining_seconds", "Remaining time per timer",
+              lambda: {(t.name,): t.remaining() for t in TIMERS.values()}, ("timer",))
+METRICS.gauge("subathon_timer_owner", "1 if this worker owns the timers and connectors",
+              lambda: int(is_owner()))
+
+@app.route("/metrics")
+def get_metrics():
+    return app.response_class(METRICS.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/connectors")
+@owner_route
+def get_connectors():
+    return jsonify(supervisor.status())
+
+@app.route("/broadcast")
+@owner_route
+def get_broadcast():
+    stats = broadcaster.stats()
+    stats["rooms"] = {t.name: broadcaster.room_size(t.room) for t in TIMERS.values()}
+    stats["control_rooms"] = {t.name: broadcaster.room_size(t.room, CONTROL_NAMESPACE) for t in TIMERS.values()}
+    return jsonify(stats)
+
+@app.route("/ingest")
+@owner_route
+def get_ingest():
+    stats = ingest.stats()
+    stats["batching"] = reward_batcher.stats()
+    stats["dedup"] = dedup.stats()
+    return jsonify(stats)
+
+def history_query():
+    """from/to (epoch seconds or local ISO time, default: last 24h) and column filters"""
+    def parse_time(name, default):
+        value = request.args.get(name)
+        if not value:
+            return default
+        try:
+            return float(value)
+        except ValueError:
+            return datetime.datetime.fromisoformat(value).timestamp()
+
+    end = parse_time("to", time.time())
+    start = parse_time("from", end - 86400)
+    filters = {k: request.args.get(k) for k in ("streamer", "connector", "platform", "type", "tier", "source")}
+    return start, end, filters
+
+@app.route("/history/summary")
+def get_history_summary():
+    try:
+        start, end, filters = history_query()
+        group_by = [g for g in request.args.get("group", "platform,type").split(",") if g]
+        groups = history.summary(start, end, group_by, **filters)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "from": start,
+        "to": end,
+        "group": group_by,
+        "groups": groups,
+        "events": sum(g["events"] for g in groups),
+        "minutes": sum(g["minutes"] for g in groups),
+    })
+
+@app.route("/history.csv")
+def get_history_csv():
+    try:
+        start, end, filters = history_query()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def generate():
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(("time",) + HISTORY_COLUMNS)
+        for row in history.rows(start, end, **filters):
+            when = datetime.datetime.fromtimestamp(row[0]).isoformat(timespec="seconds")
+            writer.writerow((when,) + row)
+            if buf.tell() > 64 * 1024:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue()
+
+    resp = app.response_class(generate(), mimetype="text/csv")
+    resp.headers["Content-Disposition"] = "attachment; filename=history.csv"
+    return resp
+
 @app.route("/log")
+@owner_route
 def get_log():
-    try:
-        if not os.path.exists(LOG_FILE):
-            return jsonify({"lines": ["(keine Logdatei vorhanden)\n"]})
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            lines = f.readlines()[-100:]
-        return jsonify({"lines": lines})
-    except Exception as e:
-        return jsonify({"lines": [f"Fehler beim Lesen von {LOG_FILE}: {e}\n"]})
+    return tail_response(events_tail, 100, "(keine Logdatei vorhanden)\n")
 
 @app.route("/time_log")
+@owner_route
 def get_time_log():
-    try:
-        if not os.path.exists(TIME_ADD_LOG):
-            return jsonify({"lines": ["(no time additions yet)\n"]})
-        with open(TIME_ADD_LOG, "r", encoding="utf-8") as f:
-            lines = f.readlines()[-10:]
-        return jsonify({"lines": lines})
-    except Exception as e:
-        return jsonify({"lines": [f"Fehler beim Lesen von {TIME_ADD_LOG}: {e}\n"]})
+    return tail_response(time_add_tail, 10, "(no time additions yet)\n")
 
 # --------------------
 # Main start
 # --------------------
-if __name__ == "__main__":
+def start_owner():
+    """Everything only the timer owner runs: state, timer loop, scheduler, ingestion, connectors"""
+    global events_tail, time_add_tail
+    if lease is not None:
+        # taking over: state and log tails as the previous owner left them
+        events_tail = LogTail(LOG_FILE, capacity=500)
+        time_add_tail = LogTail(TIME_ADD_LOG, capacity=200)
+        load_state()
     socketio.start_background_task(timer_loop)
+    scheduler.start()
+    ingest.start()
 
-    # Streamer 1
-    if SE_TWITCH_TOKEN:
-        start_client(f"{LABEL_STREAMER1}-Twitch", SE_TWITCH_TOKEN, CONFIG1)
-    if SE_KICK_TOKEN:
-        start_client(f"{LABEL_STREAMER1}-Kick", SE_KICK_TOKEN, CONFIG1)
-    connect_kick_chat(f"{LABEL_STREAMER1}-KickChat", KICK_APP_KEY, KICK_CLUSTER, KICK_CHATROOM_ID, CONFIG1)
-    if TIPEEE_API_KEY:
-        start_tipeee(f"{LABEL_STREAMER1}-Tipeee", TIPEEE_API_KEY, CONFIG1)
-
-
-    # Streamer 2
-    if SE2_TWITCH_TOKEN and CONFIG2:
-        start_client(f"{LABEL_STREAMER2}-Twitch", SE2_TWITCH_TOKEN, CONFIG2)
-    if SE2_KICK_TOKEN and CONFIG2:
-        start_client(f"{LABEL_STREAMER2}-Kick", SE2_KICK_TOKEN, CONFIG2)
-    if CONFIG2:
-        connect_kick_chat(f"{LABEL_STREAMER2}-KickChat", KICK_APP_KEY2, KICK_CLUSTER2, KICK_CHATROOM_ID2, CONFIG2)
-    if TIPEEE_API_KEY2 and CONFIG2:
-        start_tipeee(f"{LABEL_STREAMER2}-Tipeee", TIPEEE_API_KEY2, CONFIG2)
-
+    for streamer in STREAMERS.values():
+        start_connectors(streamer)
+    supervisor.start()
 
+if __name__ == "__main__":
+    assets.preload(PUBLIC_URL or f"http://localhost:{PORT}")
+    socketio.start_background_task(config_watch_loop)
+    if lease is None:
+        start_owner()
+    else:
+        socketio.start_background_task(lease.run, start_owner, socketio.sleep)
 
-    print(f"[{ts()}] [APP] Subathon timer running at http://localhost:5000")
-    socketio.run(app, host="0.0.0.0", port=5000)
+    print(f"[{ts()}] [APP] Subathon timer running at http://localhost:{PORT} ({ASYNC_MODE}), "
+          f"overlay: http://localhost:{PORT}/index.html")
+    # threading mode is served by Werkzeug, which Flask-SocketIO refuses without this flag
+    socketio.run(app, host="0.0.0.0", port=PORT, allow_unsafe_werkzeug=ASYNC_MODE == "threading")
@@ -0,0 +1,162 @@
+import os
+import re
+import gzip
+import hashlib
+import mimetypes
+import posixpath
+import threading
+import collections
+
+import jsoncodec
+from helpers import ts
+
+try:
+    import brotli
+except ImportError:     # optional: pip install brotli
+    brotli = None
+
+
+# Served body in every encoding we have; gzip/br are None if not worth it
+Asset = collections.namedtuple("Asset", ["body", "gzip", "br", "etag", "digest", "mimetype"])
+
+# Where pages fetch vendored files from while tools/vendor_assets.py has not been run
+FALLBACKS = {
+    "vendor/socket.io.min.js": "https://cdn.socket.io/4.5.4/socket.io.min.js",
+    "vendor/fonts.css": "https://fonts.googleapis.com/css2?family=Bebas+Neue&family=Knewave&display=swap",
+}
+
+TEMPLATES = (".html", ".css")
+BASE_RE = re.compile(r'const BASE = "[^"]*";')
+REF_RE = re.compile(r"""(?P<pre>(?:src|href)=["']|url\(["']?)(?P<ref>[^"')?#]+)""")
+
+mimetypes.add_type("font/ttf", ".ttf")
+mimetypes.add_type("font/woff2", ".woff2")
+mimetypes.add_type("text/javascript", ".js")
+
+
+class AssetStore:
+    """
+    Serves the overlay pages and their local assets from memory.
+
+    Files are read once (again when mtime or size change), hashed and
+    precompressed with gzip and, if the brotli module is installed, brotli.
+    Pages (.html, .css) are rendered per base URL: `const BASE = "..."` is
+    set to the URL the app is reached at, and references to local files
+    get `?v=<content hash>`, so those can be cached as immutable and only
+    the page itself is revalidated via its ETag.
+    """
+
+    def __init__(self, root, pages=("index.html", "control.html", "slideshow.html", "stats.html"),
+                 dirs=("fonts", "vendor"), min_compress=256, max_rendered=64):
+        self.root = root
+        self.pages = set(pages)
+        self.dirs = tuple(d + "/" for d in dirs)
+        self.min_compress = min_compress
+        self.max_rendered = max_rendered
+        self._lock = threading.Lock()
+        self._files = {}        # rel path -> ((mtime_ns, size), digest, bytes)
+        self._static = {}       # rel path -> Asset
+        self._rendered = {}     # (rel path, base) -> (dependency digests, Asset)
+
+    def resolve(self, path):
+        """Relative path inside the served set, or None"""
+        rel = posixpath.normpath(path.lstrip("/"))
+        if rel in self.pages or (rel.startswith(self.dirs) and ".." not in rel.split("/")):
+            return rel
+        return None
+
+    def get(self, path, base=""):
+        """Asset for a request path (pages rendered for `base`), None if missing or not served"""
+        rel = self.resolve(path)
+        if rel is None:
+            return None
+        with self._lock:
+            return self._get(rel, base, depth=0)
+
+    def _get(self, rel, base, depth):
+        src = self._file(rel)
+        if src is None:
+            return None
+        digest, data = src
+        if not rel.endswith(TEMPLATES) or depth > 2:
+            asset = self._static.get(rel)
+            if asset is None or asset.digest != digest:
+                asset = self._static[rel] = self._build(data, rel)
+            return asset
+
+        key = (rel, base if rel.endswith(".html") else "")
+        cached = self._rendered.get(key)
+        if cached is not None and all(self._digest(r) == d for r, d in cached[0]):
+            return cached[1]
+        deps = [(rel, digest)]
+        text = data.decode("utf-8")
+        if rel.endswith(".html") and base:
+            literal = jsoncodec.dumps(base).replace("<", "\\u003c")   # base comes from the Host header
+            text = BASE_RE.sub(lambda m: f"const BASE = {literal};", text, count=1)
+
+        def version(m):
+            ref = m.group("ref")
+            if "://" in ref or ref.startswith(("//", "data:")):
+                return m.group(0)
+            target = posixpath.normpath(ref.lstrip("/") if ref.startswith("/")
+                                        else posixpath.join(posixpath.dirname(rel), ref))
+            if self.resolve(target) is None:
+                return m.group(0)
+            dep = self._get(target, base, depth + 1)
+            deps.append((target, self._digest(target)))
+            return m.group(0) + f"?v={dep.etag}" if dep else m.group(0)
+
+        text = REF_RE.sub(version, text)
+        asset = self._build(text.encode("utf-8"), rel, digest)
+        if len(self._rendered) >= self.max_rendered:
+            self._rendered.clear()
+        self._rendered[key] = (tuple(deps), asset)
+        return asset
+
+    def _file(self, rel):
+        """(digest, bytes), re-read when mtime or size changed; None if missing"""
+        full = os.path.join(self.root, *rel.split("/"))
+        try:
+            st = os.stat(full)
+        except OSError:
+            self._files.pop(rel, None)
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self._files.get(rel)
+        if cached is None or cached[0] != stamp:
+            with open(full, "rb") as f:
+                data = f.read()
+            cached = self._files[rel] = (stamp, hashlib.sha256(data).hexdigest()[:16], data)
+        return cached[1], cached[2]
+
+    def _digest(self, rel):
+        src = self._file(rel)
+        return src[0] if src else None
+
+    def _build(self, body, rel, digest=None):
+        mimetype = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+        gz = br = None
+        if len(body) >= self.min_compress:
+            gz = gzip.compress(body, 9, mtime=0)
+            if len(gz) > len(body) * 0.9:
+                gz = None
+            if brotli is not None:
+                br = brotli.compress(body, quality=11)
+                if len(br) > len(body) * 0.9:
+                    br = None
+        etag = hashlib.sha256(body).hexdigest()[:16]
+        return Asset(body, gz, br, etag, digest or etag, mimetype)
+
+    def preload(self, base=""):
+        """Read and compress everything up front, so the first overlay load is fast"""
+        count = 0
+        for page in sorted(self.pages):
+            count += self.get(page, base) is not None
+        for d in self.dirs:
+            for dirpath, _, names in os.walk(os.path.join(self.root, d)):
+                for name in names:
+                    rel = os.path.relpath(os.path.join(dirpath, name), self.root).replace(os.sep, "/")
+                    count += self.get(rel, base) is not None
+        missing = [rel for rel in FALLBACKS if self._digest(rel) is None]
+        note = f", not vendored yet (CDN fallback): {', '.join(missing)}" if missing else ""
+        print(f"[{ts()}] [ASSETS] {count} files ready (brotli: {'yes' if brotli else 'no'}){note}")
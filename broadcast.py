@@ -0,0 +1,105 @@
+import threading
+import time
+
+from helpers import ts
+
+
+def compact_state(state):
+    """Short-key timer_update payload: r=remaining, p=paused (0/1), e=ends_at, t=server_time"""
+    return {
+        "r": state["remaining"],
+        "p": 1 if state["paused"] else 0,
+        "e": state["ends_at"],
+        "t": state["server_time"],
+    }
+
+
+class BroadcastCoalescer:
+    """
+    Merges timer changes into at most one timer_update per timer and window.
+
+    request() only marks a timer as dirty; the first request in a window
+    schedules one flush on the scheduler thread which, after `window`
+    seconds, snapshots every dirty timer and emits to its room in every namespace listed. A snapshot
+    equal to the last one sent (same paused flag, same deadline within
+    `tolerance_ms`) is skipped.
+    """
+
+    def __init__(self, socketio, scheduler, window=0.1, tolerance_ms=50, namespaces=("/",)):
+        self.socketio = socketio
+        self.scheduler = scheduler
+        self.window = window
+        self.tolerance_ms = tolerance_ms
+        self.namespaces = tuple(namespaces)
+        self._lock = threading.Lock()
+        self._dirty = {}        # timer name -> (timer, force)
+        self._scheduled = False
+        self._last = {}         # timer name -> last payload sent
+        self.requested = 0
+        self.emitted = 0
+        self.skipped = 0
+        self.recipients = 0     # sum of room sizes over all emits
+        self.on_emit = None     # optional callback(timer name, seconds, recipients)
+
+    def request(self, timer, force=False):
+        with self._lock:
+            self.requested += 1
+            prev = self._dirty.get(timer.name)
+            self._dirty[timer.name] = (timer, force or (prev is not None and prev[1]))
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.scheduler.call_later(self.window, self.flush)
+
+    def flush(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            self._scheduled = False
+        for name, (timer, force) in dirty.items():
+            with timer.lock:
+                state = timer.snapshot()
+            payload = compact_state(state)
+            if not force and self._unchanged(name, payload):
+                with self._lock:
+                    self.skipped += 1
+                continue
+            self._last[name] = payload
+            t0 = time.perf_counter()
+            try:
+                for namespace in self.namespaces:
+                    self.socketio.emit("timer_update", payload, to=timer.room, namespace=namespace)
+            except Exception as e:
+                print(f"[{ts()}] [BROADCAST] Error while emitting for timer {name}:", e)
+                continue
+            seconds = time.perf_counter() - t0
+            recipients = sum(self.room_size(timer.room, ns) for ns in self.namespaces)
+            with self._lock:
+                self.emitted += 1
+                self.recipients += recipients
+            if self.on_emit:
+                self.on_emit(name, seconds, recipients)
+
+    def _unchanged(self, name, payload):
+        last = self._last.get(name)
+        if last is None or last["p"] != payload["p"]:
+            return False
+        if payload["p"]:
+            return last["r"] == payload["r"]
+        return abs(last["e"] - payload["e"]) <= self.tolerance_ms
+
+    def room_size(self, room, namespace="/"):
+        try:
+            return len(self.socketio.server.manager.rooms.get(namespace, {}).get(room, {}))
+        except Exception:
+            return 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "window_ms": int(self.window * 1000),
+                "requested": self.requested,
+                "emitted": self.emitted,
+                "skipped_unchanged": self.skipped,
+                "coalesced": self.requested - self.emitted - self.skipped,
+                "fanout_total": self.recipients,
+            }
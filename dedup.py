@@ -0,0 +1,164 @@
+import time
+import hashlib
+import threading
+import collections
+
+import jsoncodec
+from helpers import ts
+from jsonlog import JsonLog
+
+
+# Upstream creation time; without id and without one of these an event has no identity
+TIMESTAMP_FIELDS = ("createdAt", "created_at", "timestamp")
+
+
+def event_key(source, data):
+    """
+    Identity of an upstream event: its id (StreamElements `_id`, Tipeee and
+    Kick `id`) scoped to the connector, else a hash of the whole payload if
+    that carries an upstream timestamp. None otherwise: two anonymous T1
+    subs look exactly alike, dropping the second one would lose time.
+    """
+    eid = data.get("_id") or data.get("id")
+    if eid:
+        return f"{source}:{eid}"
+    if any(data.get(f) for f in TIMESTAMP_FIELDS):
+        return f"{source}#{hashlib.blake2b(jsoncodec.dumpb(data), digest_size=16).hexdigest()}"
+    return None
+
+
+class DedupIndex:
+    """
+    Keys of the events seen in the last `ttl` seconds, at most `max_size`
+    (the oldest go first), so an event a connector redelivers after a
+    reconnect is applied only once.
+
+    seen() is one dict lookup and, for a new key, one insert plus evicting
+    from the old end, so it stays O(1) however many keys are kept. A new key
+    is only held in memory until commit(): the caller commits it once the
+    reward of the event is journaled, so a crash before that lets the
+    redelivered event through instead of losing its minutes. Committed keys
+    are appended to a JsonLog ("[expiry, key]" per line, group commit on a
+    background thread); load() brings back the unexpired ones after a
+    restart. Every `compact_every` lines the file is rewritten from memory.
+    """
+
+    def __init__(self, path, ttl=86400.0, max_size=50000, compact_every=None):
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.compact_every = compact_every or max_size
+        self._keys = collections.OrderedDict()   # key -> expiry (epoch s), oldest first
+        self._uncommitted = set()                # seen, but not (yet) persisted
+        self._lock = threading.Lock()
+        self._log = JsonLog(path, "dedup-writer", "DEDUP", on_commit=self._committed)
+        self._since_compact = 0
+        self.checked = 0
+        self.duplicates = 0
+        self.unkeyed = 0    # events without id or timestamp, applied unchecked
+        self.evicted = 0    # dropped for max_size before their ttl ran out
+
+    # --------------------
+    # Startup
+    # --------------------
+    def load(self):
+        now = time.time()
+        lines = self._log.read()
+        for line in lines:
+            try:
+                expiry, key = line
+            except (ValueError, TypeError):
+                continue
+            if expiry > now:
+                self._keys[key] = expiry
+                self._keys.move_to_end(key)
+        with self._lock:
+            self._evict(now)
+        self._since_compact = len(lines)
+        print(f"[{ts()}] [DEDUP] Restored {len(self._keys)} event ids")
+
+    def start(self):
+        self._log.start()
+
+    # --------------------
+    # Hot path
+    # --------------------
+    def seen(self, key):
+        """True if `key` was seen within the ttl (a duplicate), otherwise remember it until commit()"""
+        now = time.time()
+        with self._lock:
+            self.checked += 1
+            if key is None:
+                self.unkeyed += 1
+                return False
+            expiry = self._keys.get(key)
+            if expiry is not None and expiry > now:
+                self.duplicates += 1
+                return True
+            self._keys[key] = now + self.ttl
+            self._keys.move_to_end(key)
+            self._uncommitted.add(key)
+            self._evict(now)
+        return False
+
+    def commit(self, keys):
+        """Persist keys passed to seen() before; their events are applied now"""
+        entries = []
+        with self._lock:
+            for key in keys:
+                if key in self._uncommitted:
+                    self._uncommitted.discard(key)
+                    entries.append([round(self._keys[key], 1), key])
+        if entries:
+            self._log.append(entries)
+
+    def _evict(self, now):
+        keys = self._keys
+        while keys:
+            key, expiry = next(iter(keys.items()))
+            if expiry > now and len(keys) <= self.max_size:
+                break
+            keys.popitem(last=False)
+            self._uncommitted.discard(key)
+            if expiry > now:
+                self.evicted += 1
+
+    def flush(self, timeout=5.0):
+        """Block until every committed key so far is on disk"""
+        self._log.flush(timeout)
+
+    def close(self):
+        self.flush()
+        self._compact()
+
+    # --------------------
+    # Writer thread
+    # --------------------
+    def _committed(self, entries, seconds):
+        self._since_compact += len(entries)
+        if self._since_compact >= self.compact_every:
+            self._compact()
+
+    def _compact(self):
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            entries = [[round(e, 1), k] for k, e in self._keys.items() if k not in self._uncommitted]
+        try:
+            self._log.rewrite(entries)
+            self._since_compact = len(entries)
+        except Exception as e:
+            print(f"[{ts()}] [DEDUP] Error while compacting {self.path}:", e)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ids": len(self._keys),
+                "uncommitted": len(self._uncommitted),
+                "max_ids": self.max_size,
+                "ttl_hours": round(self.ttl / 3600, 2),
+                "checked": self.checked,
+                "duplicates": self.duplicates,
+                "unkeyed": self.unkeyed,
+                "evicted": self.evicted,
+            }
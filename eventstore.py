@@ -0,0 +1,171 @@
+import queue
+import sqlite3
+import threading
+import time
+
+from helpers import ts
+
+
+COLUMNS = ("ts", "streamer", "connector", "platform", "type", "tier", "amount",
+           "minutes", "remaining", "label", "source")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rewards (
+    id        INTEGER PRIMARY KEY,
+    ts        REAL    NOT NULL,   -- epoch seconds
+    streamer  TEXT,               -- streamer id ("1", "2", ...)
+    connector TEXT,               -- e.g. "Streamer1-KickChat"
+    platform  TEXT,               -- twitch / kick / tipeee / streamelements
+    type      TEXT,               -- sub / gifted_sub / gift_bundle / cheer / kick_gift / donation / tip
+    tier      TEXT,
+    amount    REAL,               -- subs in a bundle, bits, kicks, euros
+    minutes   INTEGER NOT NULL,
+    remaining INTEGER,            -- timer after the reward (seconds), NULL for backfilled rows
+    label     TEXT,
+    source    TEXT    NOT NULL DEFAULT 'live'
+);
+CREATE INDEX IF NOT EXISTS rewards_ts ON rewards (ts);
+CREATE INDEX IF NOT EXISTS rewards_platform_ts ON rewards (platform, ts);
+CREATE INDEX IF NOT EXISTS rewards_type_ts ON rewards (type, ts);
+"""
+
+# group= values for summary(); time buckets use local time like the logs
+GROUPS = {
+    "streamer": "streamer",
+    "connector": "connector",
+    "platform": "platform",
+    "type": "type",
+    "tier": "tier",
+    "hour": "strftime('%Y-%m-%d %H:00', ts, 'unixepoch', 'localtime')",
+    "day": "strftime('%Y-%m-%d', ts, 'unixepoch', 'localtime')",
+}
+FILTERS = ("streamer", "connector", "platform", "type", "tier", "source")
+
+
+class EventStore:
+    """
+    SQLite history with one row per applied reward.
+
+    The reward path only queues rows; a background thread inserts everything
+    queued since its last pass in one transaction. The database runs in WAL
+    mode, so queries (own connection per call) read while the writer writes.
+    """
+
+    def __init__(self, path, batch_size=500, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.written_total = 0
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    # --------------------
+    # Writing
+    # --------------------
+    def record(self, **row):
+        """Queue one reward row (keys from COLUMNS). Never blocks."""
+        if self._thread is None:
+            self._start()
+        self._queue.put(tuple(row.get(c) if c != "source" else row.get(c, "live") for c in COLUMNS))
+
+    def insert_many(self, rows):
+        """Insert row dicts synchronously in one transaction (backfill)"""
+        values = [tuple(r.get(c) if c != "source" else r.get(c, "live") for c in COLUMNS) for r in rows]
+        with self._connect() as db:
+            self._insert(db, values)
+        return len(values)
+
+    def _insert(self, db, values):
+        db.executemany(
+            f"INSERT INTO rewards ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", values)
+        self.written_total += len(values)
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="event-store", daemon=True)
+                self._thread.start()
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is committed"""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def _run(self):
+        db = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and not isinstance(batch[-1], threading.Event):
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            values = [r for r in batch if isinstance(r, tuple)]
+            if values:
+                try:
+                    with db:
+                        self._insert(db, values)
+                except Exception as e:
+                    print(f"[{ts()}] [HISTORY] Error while writing {len(values)} rows:", e)
+            for r in batch:
+                if isinstance(r, threading.Event):
+                    r.set()
+
+    # --------------------
+    # Queries
+    # --------------------
+    def _where(self, start, end, filters):
+        clauses, args = ["ts >= ?", "ts < ?"], [start, end]
+        for key in FILTERS:
+            if filters.get(key) is not None:
+                clauses.append(f"{key} = ?")
+                args.append(filters[key])
+        return " AND ".join(clauses), args
+
+    def summary(self, start, end, group_by=(), **filters):
+        """Events and minutes in [start, end) per group (group_by: keys of GROUPS)"""
+        for g in group_by:
+            if g not in GROUPS:
+                raise ValueError(f"unknown group {g!r}, use one of {', '.join(GROUPS)}")
+        where, args = self._where(start, end, filters)
+        cols = [f"{GROUPS[g]} AS {g}" for g in group_by]
+        sql = f"SELECT {', '.join(cols + ['COUNT(*)', 'COALESCE(SUM(minutes), 0)'])} FROM rewards WHERE {where}"
+        if group_by:
+            sql += f" GROUP BY {', '.join(group_by)} ORDER BY {', '.join(group_by)}"
+        db = self._connect()
+        try:
+            rows = db.execute(sql, args).fetchall()
+        finally:
+            db.close()
+        groups = []
+        for row in rows:
+            g = dict(zip(group_by, row))
+            g["events"], g["minutes"] = row[-2], row[-1]
+            groups.append(g)
+        return groups
+
+    def rows(self, start, end, **filters):
+        """Yield rows in [start, end) as tuples in COLUMNS order, oldest first"""
+        where, args = self._where(start, end, filters)
+        db = self._connect()
+        try:
+            for row in db.execute(f"SELECT {', '.join(COLUMNS)} FROM rewards WHERE {where} ORDER BY ts, id", args):
+                yield row
+        finally:
+            db.close()
@@ -0,0 +1,6 @@
+import datetime
+
+
+def ts():
+    """Timestamp of console and log lines"""
+    return datetime.datetime.now().strftime("%d.%m.%Y - %H:%M")
@@ -0,0 +1,120 @@
+import queue
+import threading
+import time
+import collections
+
+from helpers import ts
+
+
+# Normalized event envelope pushed by every connector
+Envelope = collections.namedtuple("Envelope", ["source", "type", "data", "streamer", "received"])
+
+OVERFLOW_POLICIES = ("block", "drop_newest", "drop_oldest")
+
+
+class IngestQueue:
+    """
+    Bounded queue between the connectors and the reward logic.
+
+    Connector callbacks only wrap the raw event into an Envelope and return,
+    one worker thread applies the events in arrival order. When the queue is
+    full the overflow policy decides: "block" waits up to `block_timeout`
+    seconds and then drops, "drop_newest" rejects the new event,
+    "drop_oldest" evicts the oldest queued one. Envelopes the app queues
+    itself (timeouts closing pending state) go through submit_internal()
+    and are never dropped.
+    """
+
+    def __init__(self, handler, maxsize=10000, policy="block", block_timeout=5.0):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown overflow policy {policy!r}, use one of {OVERFLOW_POLICIES}")
+        self.handler = handler
+        self.maxsize = maxsize
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._stats_lock = threading.Lock()
+        self.enqueued = 0
+        self.applied = 0
+        self.dropped = 0
+        self.errors = 0
+        self.latency_last = 0.0
+        self.latency_max = 0.0
+        self._latency_sum = 0.0
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ingest-worker", daemon=True)
+            self._thread.start()
+
+    def submit(self, source, etype, data, streamer=None):
+        """Queue an event. Returns False if it was dropped."""
+        env = Envelope(source, etype, data, streamer, time.monotonic())
+        try:
+            if self.policy == "block":
+                self._queue.put(env, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(env)
+        except queue.Full:
+            if self.policy != "drop_oldest":
+                self._drop(env)
+                return False
+            try:
+                self._drop(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(env)
+            except queue.Full:
+                self._drop(env)
+                return False
+        with self._stats_lock:
+            self.enqueued += 1
+        return True
+
+    def submit_internal(self, source, etype, data, streamer=None):
+        """Queue an envelope of the app itself: waits for room, whatever the overflow policy"""
+        self._queue.put(Envelope(source, etype, data, streamer, time.monotonic()))
+        with self._stats_lock:
+            self.enqueued += 1
+        return True
+
+    def _drop(self, env):
+        with self._stats_lock:
+            self.dropped += 1
+        print(f"[{ts()}] [INGEST] Queue full ({self.policy}), dropped {env.type} from {env.source}")
+
+    def _run(self):
+        while True:
+            env = self._queue.get()
+            try:
+                self.handler(env)
+            except Exception as e:
+                with self._stats_lock:
+                    self.errors += 1
+                print(f"[{ts()}] [INGEST] Error while applying {env.type} from {env.source}:", e)
+            latency = time.monotonic() - env.received
+            with self._stats_lock:
+                self.applied += 1
+                self.latency_last = latency
+                self.latency_max = max(self.latency_max, latency)
+                self._latency_sum += latency
+
+    def stats(self):
+        with self._stats_lock:
+            avg = self._latency_sum / self.applied if self.applied else 0.0
+            return {
+                "depth": self._queue.qsize(),
+                "max_size": self.maxsize,
+                "policy": self.policy,
+                "enqueued": self.enqueued,
+                "applied": self.applied,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "latency_ms": {
+                    "last": round(self.latency_last * 1000, 3),
+                    "avg": round(avg * 1000, 3),
+                    "max": round(self.latency_max * 1000, 3),
+                },
+            }
@@ -0,0 +1,108 @@
+import os
+import threading
+
+import jsoncodec
+from helpers import ts
+from jsonlog import JsonLog, write_atomic
+
+
+class StateJournal:
+    """
+    Write-ahead journal for the timer state.
+
+    Every mutation is appended as one JSON line carrying the state after the
+    change; keys a record leaves out (e.g. stats, which are only written
+    now and then) keep their previous value. Replay folds the records in
+    order. The journal is a JsonLog: a background thread group-commits
+    everything queued with one flush + fsync, so callers never wait for the
+    disk, and a torn last line is cut off on load. Every `compact_every`
+    records the journal is folded into an atomically renamed snapshot (the
+    classic state.json) and truncated.
+    """
+
+    def __init__(self, snapshot_path, journal_path, compact_every=1000):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.compact_every = compact_every
+        self._log = JsonLog(journal_path, "state-journal", "STATE", on_commit=self._committed)
+        self._seq_lock = threading.Lock()
+        self._seq = 0
+        self._since_compact = 0
+        self._last = None
+        self.on_commit = None   # optional callback(seconds, records) after each group commit
+
+    # --------------------
+    # Startup
+    # --------------------
+    def load(self):
+        """Return the newest persisted state (snapshot + journal replay) or None"""
+        state = None
+        seq = 0
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    state = jsoncodec.load(f)
+                seq = int(state.get("seq", 0))
+            except Exception as e:
+                print(f"[{ts()}] [STATE] Snapshot unreadable, replaying journal only:", e)
+                state = None
+
+        replayed = 0
+        for rec in self._log.read():
+            if not isinstance(rec, dict) or rec.get("seq", 0) <= seq:
+                continue
+            state = dict(state, **rec) if state else rec
+            seq = rec["seq"]
+            replayed += 1
+        self._since_compact = replayed
+
+        self._seq = seq
+        self._last = state
+        if replayed:
+            print(f"[{ts()}] [STATE] Replayed {replayed} journal records (seq {seq})")
+        return state
+
+    def start(self):
+        self._log.start()
+
+    # --------------------
+    # Hot path
+    # --------------------
+    def record(self, op, state):
+        """Queue a mutation. Cheap enough to call while holding the timer lock."""
+        with self._seq_lock:
+            self._seq += 1
+            rec = dict(state, seq=self._seq, op=op)
+        self._log.append([rec])
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is on disk"""
+        self._log.flush(timeout)
+
+    def close(self):
+        self.flush()
+        if self._last is not None:
+            self._compact()
+
+    # --------------------
+    # Writer thread
+    # --------------------
+    def _committed(self, records, seconds):
+        for r in records:
+            self._last = dict(self._last, **r) if self._last else r
+        self._since_compact += len(records)
+        if self.on_commit:
+            self.on_commit(seconds, len(records))
+        if self._since_compact >= self.compact_every:
+            self._compact()
+
+    def _compact(self):
+        """Write the newest state as snapshot (atomic rename), then truncate the journal"""
+        try:
+            write_atomic(self.snapshot_path, jsoncodec.dumps(self._last))
+            # records <= snapshot seq are skipped on replay, so a crash
+            # between rename and truncate is harmless
+            self._log.truncate()
+            self._since_compact = 0
+        except Exception as e:
+            print(f"[{ts()}] [STATE] Error while compacting:", e)
@@ -0,0 +1,56 @@
+"""
+JSON codec used everywhere in the app: orjson when it is installed, stdlib
+json otherwise. Both backends write compact UTF-8 JSON (no ASCII escaping),
+so logs and journals look the same whichever one produced them.
+
+JSON_CODEC=json forces the stdlib backend (for comparison or debugging).
+"""
+import os
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if os.getenv("JSON_CODEC", "").lower() == "json":
+    orjson = None
+
+BACKEND = "orjson" if orjson else "json"
+
+# orjson raises this for invalid input, it is a ValueError like the stdlib one
+JSONDecodeError = orjson.JSONDecodeError if orjson else json.JSONDecodeError
+
+
+if orjson:
+    # int dict keys are turned into strings, like the stdlib does
+    _OPTS = orjson.OPT_NON_STR_KEYS
+
+    def loads(s):
+        return orjson.loads(s)
+
+    def dumpb(obj, indent=False):
+        """Serialize to UTF-8 bytes"""
+        return orjson.dumps(obj, option=_OPTS | orjson.OPT_INDENT_2 if indent else _OPTS)
+
+    def dumps(obj, indent=False, **_kwargs):
+        """Serialize to str. Extra stdlib arguments (separators, ...) are ignored."""
+        return orjson.dumps(obj, option=_OPTS | orjson.OPT_INDENT_2 if indent else _OPTS).decode("utf-8")
+
+else:
+    def loads(s):
+        return json.loads(s)
+
+    def dumps(obj, indent=False, **_kwargs):
+        """Serialize to str. Extra stdlib arguments (separators, ...) are ignored."""
+        if indent:
+            return json.dumps(obj, ensure_ascii=False, indent=2)
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    def dumpb(obj, indent=False):
+        """Serialize to UTF-8 bytes"""
+        return dumps(obj, indent).encode("utf-8")
+
+
+def load(f):
+    return loads(f.read())
@@ -0,0 +1,119 @@
+import os
+import time
+import queue
+import threading
+
+import jsoncodec
+from helpers import ts
+
+
+def write_atomic(path, text):
+    """Replace `path` with `text`: tmp file + fsync + rename, so readers see the old or the new file"""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class JsonLog:
+    """
+    Append-only file of JSON lines with one background writer thread.
+
+    append() only queues; the thread writes everything queued since its
+    last write with a single flush + fsync (group commit), so callers never
+    wait for the disk, and then calls on_commit(items, seconds) on the
+    writer thread. read() returns the valid lines and cuts a torn tail
+    (crash mid-write) off the file, so the next append starts on a line of
+    its own instead of being glued onto the fragment.
+    """
+
+    def __init__(self, path, name, tag, on_commit=None):
+        self.path = path
+        self.name = name        # writer thread name
+        self.tag = tag          # console tag of error messages
+        self.on_commit = on_commit
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def read(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            data = f.read()
+        items = []
+        pos = valid_end = 0
+        for line in data.splitlines(keepends=True):
+            pos += len(line)
+            try:
+                item = jsoncodec.loads(line) if line.endswith(b"\n") else None
+            except ValueError:
+                item = None
+            if item is None:
+                continue  # torn line from a crash
+            items.append(item)
+            valid_end = pos
+        if valid_end < len(data):
+            os.truncate(self.path, valid_end)
+            print(f"[{ts()}] [{self.tag}] Dropped {len(data) - valid_end} bytes of torn tail from {self.path}")
+        return items
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._writer, name=self.name, daemon=True)
+            self._thread.start()
+
+    def append(self, items):
+        """Queue a list of items, written in order. Never blocks."""
+        self._queue.put(items)
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is on disk"""
+        done = threading.Event()
+        self._queue.put(done)
+        if self._thread is None:
+            self._drain()
+        done.wait(timeout)
+
+    def rewrite(self, items):
+        """Replace the whole file with `items` (atomic rename)"""
+        write_atomic(self.path, "".join(jsoncodec.dumps(i) + "\n" for i in items))
+
+    def truncate(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.flush()
+            os.fsync(f.fileno())
+
+    # --------------------
+    # Writer thread
+    # --------------------
+    def _writer(self):
+        while True:
+            self._drain()
+
+    def _drain(self):
+        batch = [self._queue.get()]
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        items = [i for b in batch if isinstance(b, list) for i in b]
+        if items:
+            t0 = time.perf_counter()
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(jsoncodec.dumps(i) + "\n" for i in items))
+                    f.flush()
+                    os.fsync(f.fileno())
+            except Exception as e:
+                print(f"[{ts()}] [{self.tag}] Error while writing {self.path}:", e)
+            else:
+                if self.on_commit:
+                    self.on_commit(items, time.perf_counter() - t0)
+
+        for b in batch:
+            if isinstance(b, threading.Event):
+                b.set()
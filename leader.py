@@ -0,0 +1,80 @@
+import os
+import time
+
+import jsoncodec
+from helpers import ts
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+
+class OwnerLease:
+    """
+    Picks the one worker process that owns the timers and connectors.
+
+    The owner is whoever holds an exclusive lock on `path`. The OS drops the
+    lock when the process dies, so a waiting worker takes over within `poll`
+    seconds, without heartbeats or expiry clocks. The owner publishes its
+    URL in `<path>.owner`, so the other workers know where to forward
+    mutations. All workers must share the directory (same host).
+    """
+
+    def __init__(self, path, url, poll=1.0):
+        self.path = path
+        self.info_path = path + ".owner"
+        self.url = url
+        self.poll = poll
+        self.is_owner = False
+        self._fd = None
+        self._info = (None, None)   # (mtime, url) of the last read info file
+
+    def try_acquire(self):
+        """Take the lock if it is free. Never blocks."""
+        if self.is_owner:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        self.is_owner = True
+        self._publish()
+        return True
+
+    def _publish(self):
+        tmp = self.info_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(jsoncodec.dumps({"url": self.url, "pid": os.getpid(), "since": time.time()}))
+        os.replace(tmp, self.info_path)
+
+    def run(self, on_acquired, sleep=time.sleep):
+        """Wait until this worker owns the lease, then call on_acquired() once"""
+        announced = False
+        while not self.try_acquire():
+            if not announced:
+                print(f"[{ts()}] [LEASE] Waiting as standby, owner is {self.owner_url() or 'unknown'}")
+                announced = True
+            sleep(self.poll)
+        print(f"[{ts()}] [LEASE] This worker ({self.url}) now owns the timers")
+        on_acquired()
+
+    def owner_url(self):
+        """URL of the current owner (None if nobody published one yet)"""
+        if self.is_owner:
+            return self.url
+        try:
+            mtime = os.path.getmtime(self.info_path)
+            if mtime != self._info[0]:
+                with open(self.info_path, "r", encoding="utf-8") as f:
+                    self._info = (mtime, jsoncodec.load(f).get("url"))
+        except (OSError, ValueError):
+            return None
+        return self._info[1]
@@ -0,0 +1,243 @@
+import os
+import gzip
+import uuid
+import itertools
+import collections
+import queue
+import shutil
+import threading
+import time
+import datetime
+
+from helpers import ts
+
+
+class LogWriter:
+    """
+    Single background stage for all logfile writes.
+
+    Callers only put finished lines into a bounded queue and never touch the
+    filesystem. The writer thread keeps the files open, batches lines and
+    flushes when `batch_size` lines are buffered or `flush_interval` seconds
+    have passed. Files are rotated when they exceed `max_bytes` or the day
+    changes; rotated files are gzip-compressed. If the queue is full the
+    line is dropped and counted, and the count is written into the log once
+    the writer catches up.
+    """
+
+    def __init__(self, max_queue=10000, batch_size=500, flush_interval=1.0,
+                 max_bytes=50 * 1024 * 1024, rotate_daily=True):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._files = {}     # path -> {"f": handle, "size": int, "day": date}
+        self._dropped = {}   # path -> lines dropped since last report
+        self._dropped_lock = threading.Lock()
+        self.dropped_total = 0
+        self.written_total = 0
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    # --------------------
+    # Producer side
+    # --------------------
+    def write(self, path, line):
+        """Queue a line (with trailing newline). Never blocks."""
+        try:
+            self._queue.put_nowait((path, line))
+        except queue.Full:
+            with self._dropped_lock:
+                self._dropped[path] = self._dropped.get(path, 0) + 1
+                self.dropped_total += 1
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is written (used on shutdown)"""
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        if self._thread is None:
+            while not done.is_set():
+                self._process(self._take_batch(block=False))
+        done.wait(timeout)
+
+    def close(self):
+        self.flush()
+        for entry in self._files.values():
+            try:
+                entry["f"].close()
+            except Exception:
+                pass
+        self._files.clear()
+
+    # --------------------
+    # Writer thread
+    # --------------------
+    def _run(self):
+        while True:
+            self._process(self._take_batch(block=True))
+
+    def _take_batch(self, block):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if block and timeout > 0:
+                    item = self._queue.get(timeout=timeout)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            if isinstance(item, threading.Event):
+                break
+        return batch
+
+    def _process(self, batch):
+        by_path = {}
+        events = []
+        for item in batch:
+            if isinstance(item, threading.Event):
+                events.append(item)
+            else:
+                by_path.setdefault(item[0], []).append(item[1])
+
+        with self._dropped_lock:
+            dropped, self._dropped = self._dropped, {}
+        for path, n in dropped.items():
+            by_path.setdefault(path, []).append(
+                f"[{ts()}] [LOG] {n} lines dropped (writer backlog full)\n")
+
+        for path, lines in by_path.items():
+            try:
+                self._write_lines(path, lines)
+            except Exception as e:
+                print(f"[{ts()}] [LOG] Error while writing to {path}:", e)
+
+        for entry in self._files.values():
+            try:
+                entry["f"].flush()
+            except Exception:
+                pass
+        for ev in events:
+            ev.set()
+
+    def _write_lines(self, path, lines):
+        data = "".join(lines)
+        entry = self._open(path)
+        if self._needs_rotation(entry, len(data)):
+            self._rotate(path)
+            entry = self._open(path)
+        entry["f"].write(data)
+        entry["size"] += len(data.encode("utf-8"))
+        self.written_total += len(lines)
+
+    def _open(self, path):
+        entry = self._files.get(path)
+        if entry is None:
+            f = open(path, "a", encoding="utf-8")
+            size = f.tell()
+            day = datetime.date.today()
+            if size:
+                day = datetime.date.fromtimestamp(os.path.getmtime(path))
+            entry = {"f": f, "size": size, "day": day}
+            self._files[path] = entry
+        return entry
+
+    def _needs_rotation(self, entry, incoming):
+        if entry["size"] == 0:
+            return False
+        if self.max_bytes and entry["size"] + incoming > self.max_bytes:
+            return True
+        return self.rotate_daily and entry["day"] != datetime.date.today()
+
+    def _rotate(self, path):
+        entry = self._files.pop(path)
+        entry["f"].close()
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        rotated = f"{path}.{stamp}"
+        os.replace(path, rotated)
+        with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(rotated)
+        print(f"[{ts()}] [LOG] Rotated {path} -> {rotated}.gz")
+
+
+def read_tail(path, n, block_size=8192):
+    """Return the last n lines of a file by seeking backwards from the end"""
+    if n <= 0 or not os.path.exists(path):
+        return []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        while pos > 0 and data.count(b"\n") <= n:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.decode("utf-8", errors="replace").splitlines(keepends=True)
+    return lines[-n:]
+
+
+class LogTail:
+    """
+    In-memory ring buffer of the most recent lines of one logfile.
+
+    Filled from the file tail once at startup, then fed directly by the log
+    functions, so reading recent lines never touches the disk. Every line
+    gets a sequence number; `cursor` is "<boot>-<seq>" so cursors from a
+    previous process are recognised and answered with a full tail.
+    """
+
+    def __init__(self, path, capacity=1000):
+        self.path = path
+        self._lines = collections.deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._boot = uuid.uuid4().hex[:8]
+        for line in read_tail(path, capacity):
+            self._append(line)
+
+    def _append(self, line):
+        self._seq += 1
+        self._lines.append((self._seq, line))
+
+    def append(self, line):
+        """Add a line, returns the cursor that points right after it"""
+        with self._lock:
+            self._append(line)
+            return self.cursor()
+
+    def cursor(self):
+        return f"{self._boot}-{self._seq}"
+
+    def read(self, limit, since=None):
+        """
+        Return (lines, cursor, reset). With a valid `since` only lines after
+        it are returned; reset=True means the client must replace its view.
+        """
+        with self._lock:
+            after = None
+            if since:
+                boot, _, seq = since.partition("-")
+                if boot == self._boot and seq.isdigit():
+                    after = int(seq)
+                    oldest = self._lines[0][0] if self._lines else self._seq + 1
+                    if after < oldest - 1 or after > self._seq:
+                        after = None  # fell out of the buffer (or bogus): full tail
+            if after is None:
+                lines = [l for _, l in self._lines][-limit:] if limit else []
+                return lines, self.cursor(), True
+            # seqs in the buffer are contiguous, so skip straight to `after`
+            start = max(len(self._lines) - (self._seq - after), len(self._lines) - limit)
+            new = [l for _, l in itertools.islice(self._lines, start, None)]
+            return new, self.cursor(), False
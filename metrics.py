@@ -0,0 +1,188 @@
+import threading
+import time
+
+
+# Default latency buckets in seconds (100 µs .. 5 s)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for n, v in zip(names, values):
+        v = str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{n}="{v}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _num(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """Collects metrics and renders them in the Prometheus text format (0.0.4)"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, fn, labelnames=(), kind="gauge"):
+        """Value(s) computed at scrape time: fn() returns a number or {label tuple: number}"""
+        return self.register(CallbackMetric(name, help, fn, labelnames, kind))
+
+    def render(self):
+        out = []
+        for m in self._metrics:
+            out.append(f"# HELP {m.name} {m.help}")
+            out.append(f"# TYPE {m.name} {m.kind}")
+            out.extend(m.samples())
+        return "\n".join(out) + "\n"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, lv)} {_num(v)}" for lv, v in items]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # labelvalues -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        with self._lock:
+            s = self._series.get(labelvalues)
+            if s is None:
+                s = self._series[labelvalues] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    s[i] += 1
+                    break
+            s[-2] += value
+            s[-1] += 1
+
+    def time(self, *labelvalues):
+        """Context manager observing the duration of the block"""
+        return _Timer(self, labelvalues)
+
+    def samples(self):
+        with self._lock:
+            items = [(lv, list(s)) for lv, s in self._series.items()]
+        lines = []
+        names = self.labelnames + ("le",)
+        for lv, s in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, s):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels(names, lv + (_num(float(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(names, lv + ('+Inf',))} {s[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, lv)} {_num(s[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, lv)} {s[-1]}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, hist, labelvalues):
+        self.hist = hist
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0, *self.labelvalues)
+
+
+class CallbackMetric:
+    def __init__(self, name, help, fn, labelnames=(), kind="gauge"):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+
+    def samples(self):
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        if not isinstance(value, dict):
+            return [f"{self.name} {_num(value)}"]
+        return [f"{self.name}{_labels(self.labelnames, lv)} {_num(v)}" for lv, v in value.items()]
+
+
+class TimedLock:
+    """
+    Drop-in for threading.Lock that records how long callers waited for it
+    and how long it was held. Both are observed after release, so the
+    measurement itself does not extend the critical section.
+    """
+
+    def __init__(self, wait_hist, hold_hist, label):
+        self._lock = threading.Lock()
+        self.wait_hist = wait_hist
+        self.hold_hist = hold_hist
+        self.label = label
+        self._wait = 0.0
+        self._acquired_at = 0.0
+
+    def acquire(self, blocking=True, timeout=-1):
+        t0 = time.perf_counter()
+        ok = self._lock.acquire(blocking, timeout)
+        if ok:
+            self._acquired_at = time.perf_counter()
+            self._wait = self._acquired_at - t0
+        return ok
+
+    def release(self):
+        wait = self._wait
+        hold = time.perf_counter() - self._acquired_at
+        self._lock.release()
+        self.wait_hist.observe(wait, self.label)
+        self.hold_hist.observe(hold, self.label)
+
+    def locked(self):
+        return self._lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,207 @@
+import io
+import os
+import sys
+import time
+import heapq
+import pstats
+import cProfile
+import marshal
+import datetime
+import threading
+import itertools
+import collections
+
+
+# --------------------
+# Per-stage spans
+# --------------------
+class Trace:
+    """
+    Stage timings of one event. mark(stage) closes the stage that ran since
+    the previous mark; add() records a stage measured elsewhere (queue wait).
+    """
+
+    __slots__ = ("label", "started", "wall", "last", "spans", "info", "handed_off")
+
+    def __init__(self, label, **info):
+        self.label = label
+        self.started = self.last = time.perf_counter()
+        self.wall = time.time()
+        self.spans = []
+        self.info = info
+        self.handed_off = False   # finished by whoever it was handed to (reward batch)
+
+    def mark(self, stage, now=None):
+        now = time.perf_counter() if now is None else now
+        self.spans.append((stage, now - self.last))
+        self.last = now
+
+    def add(self, stage, seconds):
+        self.spans.append((stage, seconds))
+
+    def total(self):
+        return sum(s for _, s in self.spans)
+
+
+class Tracer:
+    """
+    Keeps the `keep` slowest traces (min-heap, so a new trace costs one
+    comparison unless it is among the slowest). The trace of the event the
+    current thread works on is thread-local, so deep call sites can mark()
+    without passing it around; mark() is a no-op outside a trace.
+    """
+
+    def __init__(self, keep=50):
+        self.keep = keep
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.finished = 0
+
+    def begin(self, label, **info):
+        trace = Trace(label, **info)
+        self._local.trace = trace
+        return trace
+
+    def current(self):
+        return getattr(self._local, "trace", None)
+
+    def mark(self, stage):
+        trace = getattr(self._local, "trace", None)
+        if trace is not None:
+            trace.mark(stage)
+
+    def hand_off(self):
+        """Detach the current trace; the caller passes it on and finishes it later"""
+        trace = getattr(self._local, "trace", None)
+        if trace is not None:
+            trace.handed_off = True
+            self._local.trace = None
+        return trace
+
+    def finish(self, trace):
+        if getattr(self._local, "trace", None) is trace:
+            self._local.trace = None
+        self._keep(trace.total(), trace)
+
+    def record(self, label, spans, **info):
+        """One-shot trace from already measured stages ({stage: seconds})"""
+        trace = Trace(label, **info)
+        trace.spans = list(spans.items())
+        self._keep(trace.total(), trace)
+
+    def _keep(self, total, trace):
+        if not self.keep:
+            return
+        with self._lock:
+            self.finished += 1
+            item = (total, next(self._seq), trace)
+            if len(self._heap) < self.keep:
+                heapq.heappush(self._heap, item)
+            elif total > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+
+    def slowest(self):
+        with self._lock:
+            items = sorted(self._heap, key=lambda x: -x[0])
+        return [{
+            "label": t.label,
+            "at": datetime.datetime.fromtimestamp(t.wall).isoformat(timespec="milliseconds"),
+            "total_ms": round(total * 1000, 3),
+            "spans_ms": {stage: round(s * 1000, 3) for stage, s in t.spans},
+            **t.info,
+        } for total, _, t in items]
+
+    def reset(self):
+        with self._lock:
+            self._heap = []
+            self.finished = 0
+
+
+# --------------------
+# On-demand profiles
+# --------------------
+class EventProfiler:
+    """
+    cProfile of the event path, only while a capture runs. call() wraps the
+    entry points (ingest worker, reward batches); every thread gets its own
+    profile, the capture merges them. Outside a capture call() is a plain call.
+    """
+
+    def __init__(self):
+        self._profiles = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def call(self, fn, *args):
+        profiles = self._profiles
+        if profiles is None or getattr(self._local, "active", False):
+            return fn(*args)
+        ident = threading.get_ident()
+        prof = profiles.get(ident)
+        if prof is None:
+            with self._lock:
+                prof = profiles.setdefault(ident, cProfile.Profile())
+        self._local.active = True
+        try:
+            return prof.runcall(fn, *args)
+        finally:
+            self._local.active = False
+
+    def capture(self, seconds, sleep=time.sleep):
+        """Profile for `seconds`; returns pstats.Stats, or None if no event came in"""
+        with self._lock:
+            if self._profiles is not None:
+                raise RuntimeError("a capture is already running")
+            self._profiles = {}
+        try:
+            sleep(seconds)
+        finally:
+            with self._lock:
+                profiles, self._profiles = self._profiles, None
+        stats = None
+        for prof in profiles.values():
+            prof.create_stats()
+            if stats is None:
+                stats = pstats.Stats(prof)
+            else:
+                stats.add(prof)
+        return stats
+
+
+def stats_text(stats, sort="cumulative", limit=60):
+    out = io.StringIO()
+    stats.stream = out
+    stats.sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def stats_dump(stats):
+    """Bytes of a .pstats file (what Stats.dump_stats writes), for snakeviz & co."""
+    return marshal.dumps(stats.stats)
+
+
+def sample_stacks(seconds, interval=0.005, sleep=time.sleep):
+    """
+    Sample the stacks of all threads every `interval` seconds. Returns the
+    collapsed format ("thread;outer;...;inner count" per line) that
+    flamegraph.pl and speedscope read.
+    """
+    own = threading.get_ident()
+    counts = collections.Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            counts[";".join(reversed(stack))] += 1
+        sleep(interval)
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
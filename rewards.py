@@ -0,0 +1,160 @@
+import os
+import jsoncodec
+import threading
+import collections
+
+from helpers import ts
+
+
+class ConfigError(ValueError):
+    pass
+
+
+# rate: minutes per unit, unit: how the event quantity is turned into units
+#   "each"    -> qty * rate            (subs, gift bundles)
+#   "per100"  -> (qty // 100) * rate   (bits, kicks)
+#   "per_eur" -> int(qty * rate)       (donations)
+# label: format string, `{qty}` is the event quantity
+# platform/kind/tier: the table key the rule was compiled for (filled in by RewardTable)
+Rule = collections.namedtuple("Rule", ["rate", "unit", "label", "platform", "kind", "tier"],
+                              defaults=(None, None, None))
+
+TIERS = ("1000", "2000", "3000", "prime")
+TIER_KEYS = {"1000": "sub_t1", "2000": "sub_t2", "3000": "sub_t3", "prime": "sub_t1"}
+TIER_LABELS = {"1000": "T1 Sub", "2000": "T2 Sub", "3000": "T3 Sub", "prime": "T1 Sub"}
+
+
+def minutes_for(rule, qty=1):
+    if rule.unit == "each":
+        return int(qty) * rule.rate
+    if rule.unit == "per100":
+        return (int(qty) // 100) * rule.rate
+    return int(float(qty) * rule.rate)
+
+
+def _number(cfg, section, key, required=True):
+    sec = cfg.get(section)
+    if sec is None:
+        if required:
+            raise ConfigError(f'section "{section}" is missing')
+        return None
+    if not isinstance(sec, dict):
+        raise ConfigError(f'section "{section}" must be an object')
+    value = sec.get(key)
+    if value is None:
+        raise ConfigError(f'"{section}.{key}" is missing')
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ConfigError(f'"{section}.{key}" must be a number >= 0')
+    return value
+
+
+class RewardTable:
+    """
+    A config.json compiled into a dispatch table keyed by
+    (platform, event kind, tier). Validation happens here, once, so the
+    event path only does a dict lookup. Tier is None for events without one.
+    """
+
+    def __init__(self, cfg):
+        self.raw = cfg
+        self.rules = {}
+
+        tier_minutes = {t: _number(cfg, "twitch", TIER_KEYS[t]) for t in TIERS}
+        for t in TIERS:
+            self.rules[("twitch", "sub", t)] = Rule(tier_minutes[t], "each", TIER_LABELS[t])
+            self.rules[("twitch", "gifted_sub", t)] = Rule(tier_minutes[t], "each", "Gifted Sub")
+            self.rules[("twitch", "gift_bundle", t)] = Rule(tier_minutes[t], "each", "Gift Bundle ({qty} Subs)")
+        # unknown tier -> T1 minutes
+        self.rules[("twitch", "sub", None)] = Rule(tier_minutes["1000"], "each", "Sub")
+        self.rules[("twitch", "gifted_sub", None)] = Rule(tier_minutes["1000"], "each", "Gifted Sub")
+        self.rules[("twitch", "gift_bundle", None)] = Rule(tier_minutes["1000"], "each", "Gift Bundle ({qty} Subs)")
+        self.rules[("twitch", "cheer", None)] = Rule(_number(cfg, "twitch", "bits_per_100"), "per100", "Bits ({qty})")
+
+        kick_sub = _number(cfg, "kick", "sub", required=False)
+        if kick_sub is not None:
+            for t in TIERS:
+                self.rules[("kick", "sub", t)] = Rule(kick_sub, "each", TIER_LABELS[t])
+                self.rules[("kick", "gifted_sub", t)] = Rule(kick_sub, "each", "Gifted Sub")
+            self.rules[("kick", "sub", None)] = Rule(kick_sub, "each", "Sub")
+            self.rules[("kick", "gifted_sub", None)] = Rule(kick_sub, "each", "Gifted Sub")
+            self.rules[("kick", "kick_gift", None)] = Rule(
+                _number(cfg, "kick", "kicks_per_100"), "per100", "Kick Gift ({qty})")
+
+        tipeee = _number(cfg, "tipeee", "minutes_per_eur", required=False)
+        if tipeee is not None:
+            self.rules[("tipeee", "donation", None)] = Rule(tipeee, "per_eur", "Donation ({qty:.2f} €)")
+
+        se = _number(cfg, "streamelements", "minutes_per_eur", required=False)
+        if se is not None:
+            self.rules[("streamelements", "tip", None)] = Rule(se, "per_eur", "Tip ({qty:.2f} €)")
+
+        self.rules = {key: r._replace(platform=key[0], kind=key[1], tier=key[2]) for key, r in self.rules.items()}
+
+        self.start_minutes = _number(cfg, "timer", "start_minutes")
+        max_minutes = cfg["timer"].get("max_minutes", 0)
+        if isinstance(max_minutes, bool) or not isinstance(max_minutes, (int, float)) or max_minutes < 0:
+            raise ConfigError('"timer.max_minutes" must be a number >= 0')
+        self.max_seconds = int(max_minutes * 60)  # 0 = no cap
+
+        self.rewards_list = [
+            {"name": "T 1 Sub", "minutes": tier_minutes["1000"]},
+            {"name": "T 2 Sub", "minutes": tier_minutes["2000"]},
+            {"name": "T 3 Sub", "minutes": tier_minutes["3000"]},
+            {"name": "100 Bits", "minutes": self.rules[("twitch", "cheer", None)].rate},
+        ]
+        if tipeee is not None:
+            self.rewards_list.append({"name": "1 € Donation", "minutes": tipeee})
+        if se is not None:
+            self.rewards_list.append({"name": "1 € Donation", "minutes": se})
+        if kick_sub is not None:
+            self.rewards_list.append({"name": "Kick Sub", "minutes": kick_sub})
+            self.rewards_list.append({"name": "100 Kicks", "minutes": self.rules[("kick", "kick_gift", None)].rate})
+        self.rewards_json = jsoncodec.dumps(self.rewards_list)
+
+    def rule(self, platform, kind, tier=None):
+        """Matching rule, falling back to the tier-less rule. None if not configured."""
+        r = self.rules.get((platform, kind, tier))
+        if r is None and tier is not None:
+            r = self.rules.get((platform, kind, None))
+        return r
+
+
+class RewardConfig:
+    """
+    Holder for one config file and its compiled RewardTable. Connectors keep
+    the holder, handle_event reads `.table` once per event; a reload only
+    swaps that reference, so events in flight finish with the old table.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mtime = os.path.getmtime(path)
+        self.table = self._compile()
+        self.on_reload = None
+        self._lock = threading.Lock()
+
+    def _compile(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            cfg = jsoncodec.load(f)
+        return RewardTable(cfg)
+
+    def reload_if_changed(self):
+        """Recompile if the file changed. An invalid file keeps the old table."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        with self._lock:
+            if mtime == self._mtime:
+                return False
+            self._mtime = mtime
+            try:
+                table = self._compile()
+            except (OSError, ValueError) as e:
+                print(f"[{ts()}] [CONFIG] {self.path} not reloaded, keeping previous rules:", e)
+                return False
+            self.table = table
+        print(f"[{ts()}] [CONFIG] Reloaded {self.path}")
+        if self.on_reload:
+            self.on_reload(table)
+        return True
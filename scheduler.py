@@ -0,0 +1,98 @@
+import heapq
+import itertools
+import threading
+import time
+import collections
+
+from helpers import ts
+
+
+class Scheduler:
+    """
+    One thread for all delayed callbacks (instead of a threading.Timer each).
+
+    Jobs sit in a heap ordered by due time; the thread sleeps until the
+    earliest one is due. Callbacks run on the scheduler thread and should be
+    short (e.g. push into the ingestion queue, flush a broadcast or reward
+    batch window).
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._live = set()
+        self._cancelled = set()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+            self._thread.start()
+
+    def call_later(self, delay, fn, *args):
+        """Run fn(*args) after `delay` seconds. Returns a job id for cancel()."""
+        job = next(self._seq)
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, job, fn, args))
+            self._live.add(job)
+            self._cond.notify()
+        return job
+
+    def cancel(self, job):
+        with self._cond:
+            if job in self._live:
+                self._cancelled.add(job)
+
+    def pending(self):
+        with self._cond:
+            return len(self._heap) - len(self._cancelled)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._cond.wait(timeout)
+                _, job, fn, args = heapq.heappop(self._heap)
+                self._live.discard(job)
+                if job in self._cancelled:
+                    self._cancelled.discard(job)
+                    continue
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"[{ts()}] [SCHEDULER] Error in {getattr(fn, '__name__', fn)}:", e)
+
+
+class ExpiringSet:
+    """
+    Set whose members expire `ttl` seconds after they were (last) added, and
+    which never holds more than `max_size` members. Expired members are
+    evicted lazily on add, so memory stays flat over long runs.
+    """
+
+    def __init__(self, ttl, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items = collections.OrderedDict()  # member -> expiry, oldest first
+
+    def add(self, item):
+        now = time.monotonic()
+        self._items[item] = now + self.ttl
+        self._items.move_to_end(item)
+        self._evict(now)
+
+    def __contains__(self, item):
+        expiry = self._items.get(item)
+        return expiry is not None and expiry > time.monotonic()
+
+    def __len__(self):
+        return len(self._items)
+
+    def _evict(self, now):
+        while self._items:
+            item, expiry = next(iter(self._items.items()))
+            if expiry > now and len(self._items) <= self.max_size:
+                break
+            self._items.popitem(last=False)
@@ -0,0 +1,162 @@
+import time
+import datetime
+
+
+# One counter row: [events, minutes, amount]; amount is subs, bits, kicks or euros
+def _row():
+    return [0, 0, 0.0]
+
+
+def _bump(rows, key, minutes, amount):
+    row = rows.get(key)
+    if row is None:
+        row = rows[key] = _row()
+    row[0] += 1
+    row[1] += minutes
+    row[2] += amount
+
+
+def _public(rows):
+    return {k: {"events": r[0], "minutes": r[1], "amount": round(r[2], 2)} for k, r in rows.items()}
+
+
+class TimerStats:
+    """
+    Rollups of the rewards of one timer, updated per reward in O(1):
+    totals per "platform/type", the same per hour and per day (local time,
+    only the newest `keep_hours` / `keep_days` buckets are kept) and the
+    top supporters by minutes added.
+
+    The ranking keeps a score for every supporter (up to `max_users`) and a
+    top set of `top_size`; a reward only touches the top set when its
+    supporter is in it or now beats the lowest entry. Callers hold the
+    timer lock for add(), snapshot() and dump().
+    """
+
+    def __init__(self, top_size=10, keep_hours=48, keep_days=14, max_users=100000):
+        self.top_size = top_size
+        self.keep_hours = keep_hours
+        self.keep_days = keep_days
+        self.max_users = max_users
+        self.totals = {}
+        self.hours = {}         # "YYYY-MM-DD HH" -> {key: row}, oldest first
+        self.days = {}          # "YYYY-MM-DD" -> {key: row}
+        self.users = {}         # name -> [events, minutes, amount]
+        self.top = {}           # name -> minutes, at most top_size entries
+        self._floor_user = None
+        self._floor = 0
+        self._dropped_users = 0   # supporters known before the last restart, not restored
+        self._slot = None
+        self._keys = None
+        self.dirty = False
+        self.saved_at = 0.0
+
+    # --------------------
+    # Updates
+    # --------------------
+    def add(self, platform, kind, minutes, amount, user=None, when=None):
+        key = f"{platform}/{kind}"
+        hour_key, day_key = self._bucket_keys(when or time.time())
+        _bump(self.totals, key, minutes, amount)
+        _bump(self._bucket(self.hours, hour_key, self.keep_hours), key, minutes, amount)
+        _bump(self._bucket(self.days, day_key, self.keep_days), key, minutes, amount)
+        if user:
+            self._rank(user, minutes, amount)
+        self.dirty = True
+
+    def _bucket_keys(self, when):
+        """Local hour/day names, formatted once per quarter hour (time zones are offset by n x 15 min)"""
+        slot = int(when // 900)
+        if slot != self._slot:
+            now = datetime.datetime.fromtimestamp(when)
+            self._slot = slot
+            self._keys = (now.strftime("%Y-%m-%d %H"), now.strftime("%Y-%m-%d"))
+        return self._keys
+
+    def _bucket(self, buckets, name, keep):
+        rows = buckets.get(name)
+        if rows is None:
+            rows = buckets[name] = {}
+            while len(buckets) > keep:
+                del buckets[next(iter(buckets))]
+        return rows
+
+    def _rank(self, user, minutes, amount):
+        row = self.users.get(user)
+        if row is None:
+            if len(self.users) >= self.max_users:
+                return
+            row = self.users[user] = _row()
+        row[0] += 1
+        row[1] += minutes
+        row[2] += amount
+
+        top = self.top
+        if user in top:
+            top[user] = row[1]
+            if user == self._floor_user:
+                self._refloor()
+        elif len(top) < self.top_size:
+            top[user] = row[1]
+            self._refloor()
+        elif row[1] > self._floor:
+            del top[self._floor_user]
+            top[user] = row[1]
+            self._refloor()
+
+    def _refloor(self):
+        self._floor_user = min(self.top, key=self.top.get) if self.top else None
+        self._floor = self.top[self._floor_user] if self.top else 0
+
+    # --------------------
+    # Reading
+    # --------------------
+    def supporters(self):
+        return len(self.users) + self._dropped_users
+
+    def leaderboard(self):
+        ranked = sorted(self.top, key=self.top.get, reverse=True)
+        return [{"user": u, "events": self.users[u][0], "minutes": self.users[u][1],
+                 "amount": round(self.users[u][2], 2)} for u in ranked]
+
+    def snapshot(self, history=False):
+        """Payload for overlays: totals, today, this hour and the leaderboard"""
+        now = datetime.datetime.now()
+        payload = {
+            "totals": _public(self.totals),
+            "today": _public(self.days.get(now.strftime("%Y-%m-%d"), {})),
+            "hour": _public(self.hours.get(now.strftime("%Y-%m-%d %H"), {})),
+            "top": self.leaderboard(),
+            "supporters": self.supporters(),
+            "server_time": int(time.time() * 1000),
+        }
+        if history:
+            payload["hours"] = {h: _public(rows) for h, rows in self.hours.items()}
+            payload["days"] = {d: _public(rows) for d, rows in self.days.items()}
+        return payload
+
+    # --------------------
+    # Persistence (as part of the journaled timer state)
+    # --------------------
+    def dump(self):
+        """Compact state for the journal. Supporters outside the top set are not kept."""
+        self.dirty = False
+        self.saved_at = time.monotonic()
+        # copies: the journal serializes them later, on its own thread
+        return {
+            "totals": {k: list(r) for k, r in self.totals.items()},
+            "hours": {h: {k: list(r) for k, r in rows.items()} for h, rows in self.hours.items()},
+            "days": {d: {k: list(r) for k, r in rows.items()} for d, rows in self.days.items()},
+            "top": [[u, *self.users[u]] for u in self.top],
+            "supporters": self.supporters(),
+        }
+
+    def load(self, state):
+        self.totals = {k: list(r) for k, r in state.get("totals", {}).items()}
+        self.hours = {h: {k: list(r) for k, r in rows.items()} for h, rows in state.get("hours", {}).items()}
+        self.days = {d: {k: list(r) for k, r in rows.items()} for d, rows in state.get("days", {}).items()}
+        self.users = {u: [e, m, a] for u, e, m, a in state.get("top", [])}
+        self.top = {u: row[1] for u, row in self.users.items()}
+        self._dropped_users = max(0, state.get("supporters", 0) - len(self.users))
+        self._refloor()
+        self.dirty = False
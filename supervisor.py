@@ -0,0 +1,113 @@
+import random
+import threading
+import time
+
+from helpers import ts
+
+
+class Connector:
+    """
+    One upstream connection managed by the Supervisor.
+
+    `run_once(connector)` opens the connection and blocks until it is closed
+    (returning or raising). It reports progress through mark_connected() and
+    mark_message(), which feed the health state shown on /connectors.
+    """
+
+    def __init__(self, name, kind, run_once):
+        self.name = name
+        self.kind = kind
+        self.run_once = run_once
+        self.state = "idle"            # idle, connecting, connected, backoff
+        self.connected_since = None    # monotonic
+        self.last_message = None       # monotonic
+        self.reconnects = 0
+        self.failures = 0              # consecutive, drives the backoff
+        self.last_error = None
+        self.next_retry = None         # monotonic
+        self.messages = 0
+
+    def mark_connected(self):
+        self.state = "connected"
+        self.connected_since = time.monotonic()
+        self.last_error = None
+
+    def mark_error(self, error):
+        self.last_error = str(error)
+
+    def mark_message(self):
+        self.last_message = time.monotonic()
+        self.messages += 1
+
+    def status(self):
+        now = time.monotonic()
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "state": self.state,
+            "connected_for_s": round(now - self.connected_since, 1) if self.state == "connected" else None,
+            "last_message_age_s": round(now - self.last_message, 1) if self.last_message else None,
+            "messages": self.messages,
+            "reconnects": self.reconnects,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "retry_in_s": round(max(0.0, self.next_retry - now), 1) if self.state == "backoff" else None,
+        }
+
+
+class Supervisor:
+    """
+    Owns the lifecycle of all connectors: exactly one thread per connector,
+    which runs the connection in a loop instead of reconnecting recursively.
+    After a disconnect it waits with exponential backoff and full jitter
+    (random between base and base * 2^failures, capped at `max_delay`). A
+    connection that stayed up for `stable_after` seconds resets the backoff.
+    """
+
+    def __init__(self, base_delay=1.0, max_delay=60.0, stable_after=30.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stable_after = stable_after
+        self.connectors = []
+        self._started = False
+
+    def add(self, name, kind, run_once):
+        conn = Connector(name, kind, run_once)
+        self.connectors.append(conn)
+        if self._started:
+            self._spawn(conn)
+        return conn
+
+    def start(self):
+        self._started = True
+        for conn in self.connectors:
+            self._spawn(conn)
+
+    def _spawn(self, conn):
+        threading.Thread(target=self._run, args=(conn,), name=f"conn-{conn.name}", daemon=True).start()
+
+    def backoff(self, failures):
+        ceiling = min(self.max_delay, self.base_delay * (2 ** min(failures, 16)))
+        return random.uniform(self.base_delay, max(self.base_delay, ceiling))
+
+    def _run(self, conn):
+        while True:
+            conn.state = "connecting"
+            conn.connected_since = None
+            try:
+                conn.run_once(conn)
+            except Exception as e:
+                conn.last_error = str(e)
+                print(f"[{ts()}] [{conn.name}] Connection error:", e)
+
+            up = time.monotonic() - conn.connected_since if conn.connected_since else 0
+            conn.failures = 0 if up >= self.stable_after else conn.failures + 1
+            delay = self.backoff(conn.failures)
+            conn.reconnects += 1
+            conn.state = "backoff"
+            conn.next_retry = time.monotonic() + delay
+            print(f"[{ts()}] [{conn.name}] Disconnected, reconnecting in {delay:.1f}s")
+            time.sleep(delay)
+
+    def status(self):
+        return [conn.status() for conn in self.connectors]
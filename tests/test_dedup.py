@@ -0,0 +1,88 @@
+import time
+
+from dedup import DedupIndex, event_key
+
+
+def index(tmp_path, **kwargs):
+    d = DedupIndex(str(tmp_path / "dedup.journal"), **kwargs)
+    d.load()
+    return d
+
+
+def test_seen_keys_stay_uncommitted_until_commit(tmp_path):
+    d = index(tmp_path)
+    assert not d.seen("se:a")
+    assert d.seen("se:a")               # duplicate within this process
+    assert d.stats()["uncommitted"] == 1
+    d.flush()
+    assert not (tmp_path / "dedup.journal").exists()
+
+    # crash before the reward was journaled: the redelivery goes through
+    d = index(tmp_path)
+    assert not d.seen("se:a")
+
+
+def test_committed_keys_survive_load(tmp_path):
+    d = index(tmp_path)
+    d.seen("se:a")
+    d.seen("se:b")
+    d.commit(["se:a"])
+    d.flush()
+    assert d.stats()["uncommitted"] == 1
+
+    d = index(tmp_path)
+    assert d.seen("se:a")
+    assert not d.seen("se:b")
+
+
+def test_commit_ignores_keys_not_seen_or_already_committed(tmp_path):
+    d = index(tmp_path)
+    d.seen("se:a")
+    d.commit(["se:a", "se:a", "se:x", None])
+    d.flush()
+    assert (tmp_path / "dedup.journal").read_text().count("se:a") == 1
+    assert "se:x" not in (tmp_path / "dedup.journal").read_text()
+
+
+def test_close_compacts_without_uncommitted_or_expired_keys(tmp_path):
+    d = index(tmp_path, ttl=0.2)
+    d.seen("se:old")
+    d.commit(["se:old"])
+    time.sleep(0.3)
+    d.seen("se:a")
+    d.seen("se:b")
+    d.commit(["se:a"])
+    d.close()
+
+    text = (tmp_path / "dedup.journal").read_text()
+    assert "se:a" in text
+    assert "se:b" not in text
+    assert "se:old" not in text
+
+
+def test_torn_last_line_is_dropped_on_load(tmp_path):
+    d = index(tmp_path)
+    d.seen("se:a")
+    d.commit(["se:a"])
+    d.flush()
+    with open(tmp_path / "dedup.journal", "ab") as f:
+        f.write(b'[99999999999, "se:b')
+
+    d = index(tmp_path)
+    assert d.seen("se:a")
+    d.seen("se:c")
+    d.commit(["se:c"])
+    d.flush()
+    assert index(tmp_path).seen("se:c")
+
+
+def test_event_key():
+    assert event_key("Twitch", {"_id": "x1"}) == "Twitch:x1"
+    assert event_key("Tipeee", {"id": 7}) == "Tipeee:7"
+    # no id, but an upstream timestamp: content hash, a redelivery gets the same one
+    a = event_key("Twitch", {"type": "subscriber", "createdAt": "2026-10-01T12:00:00Z"})
+    assert a and a.startswith("Twitch#")
+    assert a == event_key("Twitch", {"type": "subscriber", "createdAt": "2026-10-01T12:00:00Z"})
+    assert a != event_key("Twitch", {"type": "subscriber", "createdAt": "2026-10-01T12:00:01Z"})
+    # neither: two anonymous subs look alike, so no key
+    assert event_key("Twitch", {"type": "subscriber"}) is None
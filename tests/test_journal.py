@@ -0,0 +1,87 @@
+import json
+
+from journal import StateJournal
+
+
+def journal(tmp_path, compact_every=1000):
+    return StateJournal(str(tmp_path / "state.json"), str(tmp_path / "state.journal"), compact_every)
+
+
+def test_torn_tail_is_cut_before_the_next_append(tmp_path):
+    j = journal(tmp_path)
+    j.load()
+    j.record("add", {"remaining": 10})
+    j.record("add", {"remaining": 20})
+    j.flush()
+    with open(j.journal_path, "ab") as f:
+        f.write(b'{"remaining": 99, "se')      # crash mid-write
+
+    j = journal(tmp_path)
+    assert j.load()["remaining"] == 20
+    j.record("add", {"remaining": 30})
+    j.flush()
+
+    with open(j.journal_path, "rb") as f:
+        lines = f.read().splitlines()
+    assert [json.loads(l)["remaining"] for l in lines] == [10, 20, 30]
+    assert journal(tmp_path).load() == {"remaining": 30, "seq": 3, "op": "add"}
+
+
+def test_unterminated_last_line_counts_as_torn(tmp_path):
+    j = journal(tmp_path)
+    j.load()
+    j.record("add", {"remaining": 10})
+    j.flush()
+    with open(j.journal_path, "ab") as f:
+        f.write(b'{"remaining": 20, "seq": 2, "op": "add"}')   # complete JSON, but no newline
+
+    j = journal(tmp_path)
+    assert j.load()["remaining"] == 10
+    j.record("add", {"remaining": 30})
+    j.flush()
+    assert journal(tmp_path).load()["remaining"] == 30
+
+
+def test_replay_skips_records_up_to_the_snapshot_seq(tmp_path):
+    j = journal(tmp_path)
+    # crash between snapshot rename and journal truncate: records 1-3 are in both
+    with open(j.snapshot_path, "w", encoding="utf-8") as f:
+        json.dump({"remaining": 300, "paused": False, "seq": 3, "op": "add"}, f)
+    with open(j.journal_path, "w", encoding="utf-8") as f:
+        for seq in range(1, 6):
+            rec = {"remaining": seq * 100, "seq": seq, "op": "add"}
+            if seq <= 3:
+                rec["paused"] = True
+            f.write(json.dumps(rec) + "\n")
+
+    state = j.load()
+    assert state == {"remaining": 500, "paused": False, "seq": 5, "op": "add"}
+    j.record("add", {"remaining": 600})
+    j.flush()
+    assert journal(tmp_path).load()["seq"] == 6
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(tmp_path):
+    j = journal(tmp_path, compact_every=3)
+    j.load()
+    for i in range(1, 4):
+        j.record("add", {"remaining": i})
+    j.flush()
+
+    with open(j.snapshot_path, encoding="utf-8") as f:
+        assert json.load(f)["seq"] == 3
+    with open(j.journal_path, "rb") as f:
+        assert f.read() == b""
+    assert journal(tmp_path).load()["remaining"] == 3
+
+
+def test_records_without_a_key_keep_its_previous_value(tmp_path):
+    j = journal(tmp_path)
+    j.load()
+    j.record("tick", {"remaining": 10, "stats": {"events": 1}})
+    j.record("tick", {"remaining": 9})
+    j.close()
+
+    state = journal(tmp_path).load()
+    assert state["remaining"] == 9
+    assert state["stats"] == {"events": 1}
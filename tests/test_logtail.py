@@ -0,0 +1,74 @@
+from logwriter import LogTail
+
+
+def tail(tmp_path, lines=(), capacity=5):
+    path = tmp_path / "events.log"
+    if lines:
+        path.write_text("".join(f"{l}\n" for l in lines), encoding="utf-8")
+    return LogTail(str(path), capacity=capacity)
+
+
+def cursor_at(t, seq):
+    return f"{t.cursor().partition('-')[0]}-{seq}"
+
+
+def test_filled_from_the_file_tail(tmp_path):
+    t = tail(tmp_path, [f"line {i}" for i in range(8)])
+    lines, cursor, reset = t.read(10)
+    assert lines == [f"line {i}\n" for i in range(3, 8)]
+    assert reset
+    assert cursor == cursor_at(t, 5)
+
+
+def test_without_cursor_the_last_lines_are_sent_as_reset(tmp_path):
+    t = tail(tmp_path)
+    for i in range(4):
+        t.append(f"{i}\n")
+    assert t.read(2) == (["2\n", "3\n"], t.cursor(), True)
+    assert t.read(0) == ([], t.cursor(), True)
+
+
+def test_only_lines_after_the_cursor(tmp_path):
+    t = tail(tmp_path)
+    t.append("a\n")
+    since = t.append("b\n")
+    t.append("c\n")
+    t.append("d\n")
+    assert t.read(10, since) == (["c\n", "d\n"], t.cursor(), False)
+
+
+def test_current_cursor_gets_nothing(tmp_path):
+    t = tail(tmp_path)
+    assert t.read(10, t.cursor()) == ([], t.cursor(), False)     # empty buffer
+    t.append("a\n")
+    assert t.read(10, t.cursor()) == ([], t.cursor(), False)
+
+
+def test_cursor_right_before_the_oldest_line_gets_the_whole_buffer(tmp_path):
+    t = tail(tmp_path, capacity=3)
+    for i in range(1, 6):
+        t.append(f"{i}\n")          # buffer holds seqs 3..5
+    assert t.read(10, cursor_at(t, 2)) == (["3\n", "4\n", "5\n"], t.cursor(), False)
+
+
+def test_cursor_that_fell_out_of_the_buffer_resets(tmp_path):
+    t = tail(tmp_path, capacity=3)
+    for i in range(1, 6):
+        t.append(f"{i}\n")
+    assert t.read(10, cursor_at(t, 1)) == (["3\n", "4\n", "5\n"], t.cursor(), True)
+
+
+def test_foreign_or_bogus_cursors_reset(tmp_path):
+    t = tail(tmp_path)
+    t.append("a\n")
+    other = tail(tmp_path)          # new process, new boot id
+    for since in (other.cursor(), cursor_at(t, 99), cursor_at(t, "x"), "garbage", "-1"):
+        assert t.read(10, since) == (["a\n"], t.cursor(), True), since
+
+
+def test_limit_caps_the_lines_after_the_cursor(tmp_path):
+    t = tail(tmp_path)
+    since = t.cursor()
+    for i in range(4):
+        t.append(f"{i}\n")
+    assert t.read(2, since) == (["2\n", "3\n"], t.cursor(), False)
@@ -0,0 +1,153 @@
+"""
+Import existing time_add.log files into the reward history (history.db).
+
+Reads the given logs (plain or rotated .gz) and inserts one row per time
+addition with source='backfill'. Event type, tier and amount are taken back
+from the label, the streamer from the connector prefix. Lines from the
+logs carry no seconds and no remaining time, so those columns are coarse
+or empty. Capped rewards get the applied minutes, like the live rows.
+
+Lines from the minute of the first live row on are skipped: the app has
+recorded those itself since history.db exists, importing them again would
+count them twice.
+
+    python tools/backfill_history.py time_add.log time_add.log.*.gz
+    python tools/backfill_history.py time_add.log --replace --db history.db
+
+--replace deletes earlier backfill rows first, so the import can be rerun.
+Labels set via LABEL_STREAMER{n} in .env are mapped back to streamer n.
+"""
+import os
+import re
+import sys
+import gzip
+import sqlite3
+import argparse
+import datetime
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from dotenv import load_dotenv
+from eventstore import EventStore
+
+LINE_RE = re.compile(
+    r"^\[(?P<when>\d{2}\.\d{2}\.\d{4} - \d{2}:\d{2})\] \[(?P<connector>[^\]]+)\] "
+    r"(?P<label>.*?) \| \+(?P<minutes>\d+) minutes$")
+CAPPED_RE = re.compile(r" \(capped, \+(\d+) applied\)$")
+
+# label -> (type, tier, amount pattern); amount is group 1 of the pattern
+LABELS = [
+    (re.compile(r"^T([123]) Sub$"), "sub", None),
+    (re.compile(r"^Sub$"), "sub", None),
+    (re.compile(r"^Gifted Sub$"), "gifted_sub", None),
+    (re.compile(r"^Gift Bundle \((\d+) Subs\)$"), "gift_bundle", None),
+    (re.compile(r"^Bits \((\d+)\)$"), "cheer", None),
+    (re.compile(r"^Kick Gift \((\d+)\)$"), "kick_gift", "kick"),
+    (re.compile(r"^Donation \(([\d.]+) €\)$"), "donation", "tipeee"),
+    (re.compile(r"^Tip \(([\d.]+) €\)$"), "tip", "streamelements"),
+]
+
+
+def streamer_labels():
+    """connector prefix -> streamer id, like streamer_env() in app.py"""
+    load_dotenv(os.path.join(REPO, ".env"))
+    labels = {}
+    for key, value in os.environ.items():
+        m = re.fullmatch(r"LABEL_STREAMER(\w+)", key)
+        if m:
+            labels[value] = m.group(1)
+    return labels
+
+
+def parse_label(label):
+    """(type, tier, amount, platform) for a time_add.log label, platform may be None"""
+    for pattern, kind, platform in LABELS:
+        m = pattern.match(label)
+        if not m:
+            continue
+        if kind == "sub" and m.groups():
+            return kind, str(int(m.group(1)) * 1000), 1, platform
+        amount = float(m.group(1)) if m.groups() else 1
+        return kind, None, amount, platform
+    return None, None, None, None
+
+
+def parse_lines(path, labels):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            m = LINE_RE.match(line.rstrip("\n"))
+            if not m:
+                continue
+            label = m.group("label")
+            minutes = int(m.group("minutes"))
+            capped = CAPPED_RE.search(label)
+            if capped:
+                label = label[:capped.start()]
+                minutes = int(capped.group(1))
+            kind, tier, amount, platform = parse_label(label)
+
+            prefix, _, suffix = m.group("connector").rpartition("-")
+            if platform is None:
+                platform = "kick" if suffix.startswith("Kick") else "twitch"
+            streamer = labels.get(prefix)
+            if streamer is None:
+                sm = re.fullmatch(r"Streamer(\w+)", prefix)
+                streamer = sm.group(1) if sm else None
+
+            when = datetime.datetime.strptime(m.group("when"), "%d.%m.%Y - %H:%M")
+            yield {
+                "ts": when.timestamp(), "streamer": streamer, "connector": m.group("connector"),
+                "platform": platform, "type": kind, "tier": tier, "amount": amount,
+                "minutes": minutes, "label": m.group("label"), "source": "backfill",
+            }
+
+
+def live_since(path):
+    """Minute of the first live row (epoch s), None if the app has not recorded one yet"""
+    db = sqlite3.connect(path)
+    first = db.execute("SELECT MIN(ts) FROM rewards WHERE source = 'live'").fetchone()[0]
+    db.close()
+    # log lines only carry the minute, so the whole minute already counts as recorded
+    return None if first is None else first - first % 60
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Import time_add.log files into the reward history")
+    ap.add_argument("logs", nargs="+", help="time_add.log files, rotated .gz files are fine")
+    ap.add_argument("--db", default=os.getenv("HISTORY_DB", "history.db"))
+    ap.add_argument("--replace", action="store_true", help="delete earlier backfill rows first")
+    args = ap.parse_args()
+
+    store = EventStore(args.db)
+    if args.replace:
+        db = sqlite3.connect(args.db)
+        with db:
+            deleted = db.execute("DELETE FROM rewards WHERE source = 'backfill'").rowcount
+        db.close()
+        print(f"deleted {deleted} earlier backfill rows")
+
+    cutoff = live_since(args.db)
+    if cutoff is not None:
+        print(f"skipping lines from {datetime.datetime.fromtimestamp(cutoff):%d.%m.%Y - %H:%M} on, "
+              f"they are recorded live already")
+
+    labels = streamer_labels()
+    total = unknown = skipped = 0
+    for path in sorted(args.logs):
+        rows = []
+        for row in parse_lines(path, labels):
+            if cutoff is not None and row["ts"] >= cutoff:
+                skipped += 1
+                continue
+            rows.append(row)
+        unknown += sum(1 for r in rows if r["type"] is None)
+        total += store.insert_many(rows)
+        print(f"{path}: {len(rows)} rows")
+    print(f"imported {total} rows into {args.db}" + (f" ({unknown} with unknown event type)" if unknown else "")
+          + (f", skipped {skipped} live-recorded lines" if skipped else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark for micro-batched reward application (REWARD_BATCH_MS).
+
+Fires synthetic gift bombs (bursts of gifted subs and bits) through
+app.apply_reward, once one by one (window 0, the old per-event path) and
+once batched, and reports how many rewards per second each applies and
+persists (the clock stops when the background writers are drained). The
+timer lock, state journal, log writer and history db are the real ones
+(in a scratch directory); Socket.IO is stubbed and the scheduled batch
+and broadcast windows run after every burst, so the coalescing behaves
+like in the app.
+
+    python tools/batch_bench.py
+    python tools/batch_bench.py --sizes 1,10,100,1000 --bursts 50
+"""
+import os
+import sys
+import time
+import atexit
+import shutil
+import argparse
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from replay_bench import load_app, StubSocketIO, VirtualScheduler
+
+
+def bench(app, window, size, bursts):
+    sio = StubSocketIO()
+    sched = VirtualScheduler()
+    app.socketio = sio
+    app.broadcaster.socketio = sio
+    app.broadcaster.scheduler = app.reward_batcher.scheduler = sched
+    app.reward_batcher.window = window
+
+    records = [0]
+    save_state = app.save_state
+
+    def counting_save_state(timer, op="save"):
+        records[0] += 1
+        save_state(timer, op)
+    app.save_state = counting_save_state
+
+    streamer = app.STREAMERS[app.DEFAULT_STREAMER]
+    table = streamer.config.table
+    platform = f"{streamer.label}-Twitch"
+    gift = table.rule("twitch", "gifted_sub", "1000")
+    bits = table.rule("twitch", "cheer")
+    timer = streamer.timer
+    with timer.lock:
+        timer.set_paused(True)
+        timer.max_seconds = 0
+        start = timer.remaining()
+
+    t0 = time.perf_counter()
+    try:
+        for _ in range(bursts):
+            for i in range(size):
+                if i % 5 == 4:
+                    app.apply_reward(streamer, platform, bits, 500)
+                else:
+                    app.apply_reward(streamer, platform, gift)
+            sched.advance(None)
+        # persisted, not just queued: wait for the journal, log and history writers
+        timer.journal.flush()
+        app.log_writer.flush()
+        app.history.flush()
+    finally:
+        app.save_state = save_state
+    elapsed = time.perf_counter() - t0
+
+    total = size * bursts
+    return {
+        "rewards": total,
+        "rewards_per_sec": total / elapsed if elapsed else 0.0,
+        "journal_records": records[0],
+        "emits": sio.emits,
+        "minutes": (timer.remaining() - start) // 60,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-event vs batched reward application")
+    ap.add_argument("--sizes", default="1,10,100,500", help="rewards per burst")
+    ap.add_argument("--bursts", type=int, default=20, help="bursts per size")
+    ap.add_argument("--window-ms", type=int, default=50, help="batch window of the batched run")
+    args = ap.parse_args()
+
+    app, workdir = load_app(None)
+    rows = []
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            bench(app, 0, 100, 5)     # warm-up
+            for size in [int(x) for x in args.sizes.split(",") if x.strip()]:
+                single = bench(app, 0, size, args.bursts)
+                batched = bench(app, args.window_ms / 1000, size, args.bursts)
+                rows.append((size, single, batched))
+        app.log_writer.close()
+        app.history.flush()
+        for timer in app.TIMERS.values():
+            timer.journal.close()
+            atexit.unregister(timer.journal.close)
+        atexit.unregister(app.save_state_on_exit)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{args.bursts} bursts per size, batch window {args.window_ms} ms")
+    print(f"{'burst':>6} {'per-event/s':>12} {'batched/s':>12} {'speedup':>8} "
+          f"{'journal':>14} {'emits':>10} {'minutes':>8}")
+    for size, single, batched in rows:
+        ok = "" if single["minutes"] == batched["minutes"] else "  MISMATCH"
+        print(f"{size:>6} {single['rewards_per_sec']:>12.0f} {batched['rewards_per_sec']:>12.0f} "
+              f"{batched['rewards_per_sec'] / single['rewards_per_sec']:>7.1f}x "
+              f"{single['journal_records']:>6} -> {batched['journal_records']:<5} "
+              f"{single['emits']:>4} -> {batched['emits']:<4} {batched['minutes']:>8}{ok}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Local stand-ins for the upstream services, for load tests before a subathon.
+
+    StreamElements  ws://localhost:8765           welcome -> subscribe -> message
+    Kick (Pusher)   ws://localhost:8766/app/<key> pusher:subscribe -> App\\Events\\ChatMessageEvent
+    Tipeee          http://localhost:8767         Socket.IO "new-event"
+
+Point the app at them with
+
+    SE_WS_URL=ws://localhost:8765
+    KICK_WS_URL=ws://localhost:8766/app/{app_key}?protocol=7
+    TIPEEE_URL=http://localhost:8767
+
+(tokens/keys can be any non-empty value) and start
+
+    python tools/fake_upstreams.py --profile gift_bomb
+
+Profiles: trickle, gift_bomb, chat_flood, hype_train. --rate scales all rates.
+"""
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+
+import simple_websocket
+import socketio
+from flask import Flask, request, Response
+from werkzeug.serving import make_server
+
+
+USERS = [f"viewer{i}" for i in range(1, 500)]
+
+
+# --------------------
+# Event generators (payload shapes as app.py expects them)
+# --------------------
+def se_sub(tier=None, gifted=False, group=None):
+    ev = {
+        "_id": uuid.uuid4().hex,
+        "type": "subscriber",
+        "provider": "twitch",
+        "data": {"tier": tier or random.choice(["1000", "1000", "1000", "2000", "3000", "prime"]),
+                 "gifted": gifted, "username": random.choice(USERS)},
+    }
+    if group:
+        ev["activityGroup"] = group
+    return ev
+
+
+def se_cheer():
+    return {"_id": uuid.uuid4().hex, "type": "cheer", "provider": "twitch",
+            "data": {"amount": random.choice([100, 100, 200, 500, 1000]), "username": random.choice(USERS)}}
+
+
+def se_tip():
+    return {"_id": uuid.uuid4().hex, "type": "tip", "provider": "twitch",
+            "data": {"amount": random.choice([1, 2, 5, 10, 20]), "username": random.choice(USERS)}}
+
+
+def se_gift_bundle(size):
+    """A community gift: `size` gifted subscriber events plus the purchase, same activityGroup"""
+    group = uuid.uuid4().hex
+    events = [se_sub("1000", gifted=True, group=group) for _ in range(size)]
+    events.append({"_id": uuid.uuid4().hex, "type": "communityGiftPurchase", "provider": "twitch",
+                   "activityGroup": group,
+                   "data": {"amount": size, "tier": "1000", "username": random.choice(USERS)}})
+    return events
+
+
+def kick_chat(gift=False):
+    user = random.choice(USERS)
+    if gift:
+        content = f"{user} gifted {random.choice([100, 200, 500, 1000])} KICKs"
+    else:
+        content = random.choice(["hello", "W", "LUL", "let's go", "+1 minute pls", "KEKW"])
+    return {"id": uuid.uuid4().hex, "content": content, "sender": {"username": user}}
+
+
+def tipeee_donation():
+    return {"event": {"type": "donation", "id": uuid.uuid4().hex,
+                      "parameters": {"amount": random.choice([1, 2, 5, 10, 50]), "username": random.choice(USERS)}}}
+
+
+# Per profile: list of (upstream, events per second, generator returning a list of events)
+PROFILES = {
+    "trickle": [
+        ("se", 0.2, lambda: [random.choice([se_sub, se_cheer, se_tip])()]),
+        ("kick", 3.0, lambda: [kick_chat(gift=random.random() < 0.02)]),
+        ("tipeee", 0.05, lambda: [tipeee_donation()]),
+    ],
+    "gift_bomb": [
+        ("se", 1 / 30, lambda: se_gift_bundle(random.choice([50, 100, 200]))),
+        ("se", 0.5, lambda: [se_sub()]),
+        ("kick", 5.0, lambda: [kick_chat(gift=random.random() < 0.02)]),
+    ],
+    "chat_flood": [
+        ("kick", 500.0, lambda: [kick_chat(gift=random.random() < 0.001)]),
+        ("se", 0.2, lambda: [se_sub()]),
+    ],
+    "hype_train": [
+        ("se", 30.0, lambda: [random.choice([se_sub, se_cheer, se_cheer, se_tip])()]),
+        ("se", 0.2, lambda: se_gift_bundle(random.choice([5, 10, 20]))),
+        ("kick", 20.0, lambda: [kick_chat(gift=random.random() < 0.05)]),
+        ("tipeee", 1.0, lambda: [tipeee_donation()]),
+    ],
+}
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sent = {"se": 0, "kick": 0, "tipeee": 0}
+        self.clients = {"se": 0, "kick": 0, "tipeee": 0}
+
+    def add(self, upstream, n=1):
+        with self.lock:
+            self.sent[upstream] += n
+
+
+def paced(rate, gen, send, alive):
+    """Call send(event) for gen() at `rate` batches per second (Poisson arrivals) while alive()"""
+    while alive():
+        time.sleep(random.expovariate(rate))
+        if not alive():
+            return
+        for ev in gen():
+            send(ev)
+
+
+def start_generators(profile, upstream, rate_scale, send, alive):
+    for name, rate, gen in PROFILES[profile]:
+        if name == upstream:
+            threading.Thread(target=paced, args=(rate * rate_scale, gen, send, alive), daemon=True).start()
+
+
+# --------------------
+# Servers
+# --------------------
+def websocket_response(ws):
+    """End a request whose socket was taken over by simple_websocket (werkzeug dev server)"""
+    class WebSocketResponse(Response):
+        def __call__(self, *args, **kwargs):
+            raise ConnectionError()
+    return WebSocketResponse()
+
+
+def make_se_app(profile, rate_scale, stats):
+    app = Flask("fake-streamelements")
+
+    @app.route("/", websocket=True)
+    def se():
+        ws = simple_websocket.Server(request.environ)
+        alive = lambda: ws.connected
+        lock = threading.Lock()
+
+        def send(ev):
+            with lock:
+                ws.send(json.dumps({"type": "message", "topic": "channel.activities", "data": ev}))
+            stats.add("se")
+
+        stats.clients["se"] += 1
+        try:
+            ws.send(json.dumps({"type": "welcome", "data": {"client_id": uuid.uuid4().hex}}))
+            while ws.connected:
+                msg = json.loads(ws.receive())
+                if msg.get("type") == "subscribe":
+                    with lock:
+                        ws.send(json.dumps({"type": "response", "nonce": msg.get("nonce"),
+                                            "data": {"message": "successfully subscribed to topic"}}))
+                    start_generators(profile, "se", rate_scale, send, alive)
+        except simple_websocket.ConnectionClosed:
+            pass
+        finally:
+            stats.clients["se"] -= 1
+        return websocket_response(ws)
+
+    return app
+
+
+def make_kick_app(profile, rate_scale, stats):
+    app = Flask("fake-kick")
+
+    @app.route("/app/<key>", websocket=True)
+    def pusher(key):
+        ws = simple_websocket.Server(request.environ)
+        alive = lambda: ws.connected
+        lock = threading.Lock()
+        channel = {"name": None}
+
+        def send(inner):
+            with lock:
+                ws.send(json.dumps({"event": "App\\Events\\ChatMessageEvent",
+                                    "data": json.dumps(inner), "channel": channel["name"]}))
+            stats.add("kick")
+
+        stats.clients["kick"] += 1
+        try:
+            ws.send(json.dumps({"event": "pusher:connection_established",
+                                "data": json.dumps({"socket_id": f"{random.randint(1, 99999)}.1",
+                                                    "activity_timeout": 120})}))
+            while ws.connected:
+                msg = json.loads(ws.receive())
+                if msg.get("event") == "pusher:subscribe":
+                    channel["name"] = msg.get("data", {}).get("channel")
+                    with lock:
+                        ws.send(json.dumps({"event": "pusher_internal:subscription_succeeded",
+                                            "data": "{}", "channel": channel["name"]}))
+                    start_generators(profile, "kick", rate_scale, send, alive)
+                elif msg.get("event") == "pusher:ping":
+                    with lock:
+                        ws.send(json.dumps({"event": "pusher:pong", "data": "{}"}))
+        except simple_websocket.ConnectionClosed:
+            pass
+        finally:
+            stats.clients["kick"] -= 1
+        return websocket_response(ws)
+
+    return app
+
+
+def make_tipeee_app(profile, rate_scale, stats):
+    sio = socketio.Server(async_mode="threading", cors_allowed_origins="*")
+    connected = set()
+
+    @sio.event
+    def connect(sid, environ, auth=None):
+        connected.add(sid)
+        stats.clients["tipeee"] += 1
+
+        def send(ev):
+            sio.emit("new-event", ev, to=sid)
+            stats.add("tipeee")
+
+        start_generators(profile, "tipeee", rate_scale, send, lambda: sid in connected)
+
+    @sio.event
+    def disconnect(sid, *args):
+        connected.discard(sid)
+        stats.clients["tipeee"] -= 1
+
+    return socketio.WSGIApp(sio)
+
+
+def serve(app, port):
+    server = make_server("0.0.0.0", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Fake StreamElements / Kick / Tipeee upstreams")
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="trickle")
+    ap.add_argument("--rate", type=float, default=1.0, help="scale all event rates")
+    ap.add_argument("--se-port", type=int, default=8765)
+    ap.add_argument("--kick-port", type=int, default=8766)
+    ap.add_argument("--tipeee-port", type=int, default=8767)
+    args = ap.parse_args()
+
+    stats = Stats()
+    serve(make_se_app(args.profile, args.rate, stats), args.se_port)
+    serve(make_kick_app(args.profile, args.rate, stats), args.kick_port)
+    serve(make_tipeee_app(args.profile, args.rate, stats), args.tipeee_port)
+    print(f"profile={args.profile} rate x{args.rate}")
+    print(f"SE_WS_URL=ws://localhost:{args.se_port}")
+    print(f"KICK_WS_URL=ws://localhost:{args.kick_port}/app/{{app_key}}?protocol=7")
+    print(f"TIPEEE_URL=http://localhost:{args.tipeee_port}")
+
+    try:
+        while True:
+            time.sleep(5)
+            with stats.lock:
+                print(f"clients {stats.clients}  sent {stats.sent}")
+                sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Micro-benchmark for jsoncodec: stdlib json vs orjson on recorded payloads.
+
+Takes the RAW EVENT lines of an events.log and times the JSON work the app
+does per event: decoding the StreamElements frame, the events.log line,
+the journal record and the timer_update emit.
+
+    python tools/json_bench.py events.log
+    python tools/json_bench.py events.log --repeat 20
+
+Without orjson installed only the stdlib numbers are shown.
+"""
+import os
+import sys
+import time
+import argparse
+import importlib.util
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from replay_bench import parse_log
+
+
+def load_codec(backend):
+    """Import a private copy of jsoncodec with the given backend forced"""
+    os.environ["JSON_CODEC"] = "json" if backend == "json" else ""
+    spec = importlib.util.spec_from_file_location(f"jsoncodec_{backend}", os.path.join(REPO, "jsoncodec.py"))
+    codec = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(codec)
+    os.environ.pop("JSON_CODEC", None)
+    return codec if codec.BACKEND == backend else None
+
+
+def workloads(codec, events):
+    """name -> (function, inputs); the same inputs for every backend"""
+    std = load_codec("json")
+    frames = [std.dumps({"type": "message", "topic": "channel.activities", "data": ev}) for ev in events]
+    journal = [{"remaining": 86400 + i, "paused": False, "max_seconds": None, "seq": i, "op": "reward"}
+               for i in range(len(events))]
+    emits = [{"r": 86400 + i, "p": 0, "e": 1760000000000 + i, "t": 1760000000000} for i in range(len(events))]
+    return {
+        "decode SE frame": (codec.loads, frames),
+        "events.log line": (codec.dumps, events),
+        "debug print (indent)": (lambda ev: codec.dumps(ev, indent=True), events),
+        "journal record": (codec.dumps, journal),
+        "timer_update emit": (lambda p: codec.dumps(p, separators=(",", ":")), emits),
+    }
+
+
+def run(codec, events, repeat):
+    """Return name -> microseconds per call (best of `repeat`)"""
+    result = {}
+    for name, (fn, inputs) in workloads(codec, events).items():
+        best = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for x in inputs:
+                fn(x)
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        result[name] = best / len(inputs) * 1e6
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare stdlib json and orjson on recorded events")
+    ap.add_argument("log", help="recorded events.log")
+    ap.add_argument("--repeat", type=int, default=10, help="runs per workload, best is reported")
+    args = ap.parse_args()
+
+    events = [data for _, _, data in parse_log(args.log)]
+    if not events:
+        sys.exit(f"no RAW EVENT lines in {args.log}")
+    print(f"{len(events)} recorded events, best of {args.repeat}")
+
+    results = {}
+    for backend in ("json", "orjson"):
+        codec = load_codec(backend)
+        if codec is None:
+            print(f"{backend}: not installed")
+            continue
+        results[backend] = run(codec, events, args.repeat)
+
+    names = list(results["json"])
+    header = f"{'workload':<24}" + "".join(f"{b + ' us':>12}" for b in results)
+    if "orjson" in results:
+        header += f"{'speedup':>10}"
+    print(header)
+    for name in names:
+        row = f"{name:<24}" + "".join(f"{results[b][name]:>12.2f}" for b in results)
+        if "orjson" in results:
+            row += f"{results['json'][name] / results['orjson'][name]:>9.1f}x"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
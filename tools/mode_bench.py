@@ -0,0 +1,240 @@
+"""
+Compare the concurrency modes (ASYNC_MODE=threading / gevent) under overlay load.
+
+For every mode the app is started in a scratch directory without connectors,
+then overlay connections are opened in steps. After each step the server's
+memory (RSS) is read and one minute is added via /time, to check that every
+connected overlay still gets the timer_update and how fast.
+
+    python tools/mode_bench.py
+    python tools/mode_bench.py --modes gevent --step 500 --max 5000
+
+The clients speak raw Engine.IO over websocket-client, one greenlet each
+when gevent is installed (otherwise one thread each), so the load generator
+is not the limit. Linux only (memory is read from /proc).
+"""
+try:
+    from gevent import monkey
+    monkey.patch_all()
+    CLIENT_MODE = "gevent"
+except ImportError:
+    CLIENT_MODE = "threading"
+
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.request
+
+import websocket
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def free_port():
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+# --------------------
+# Server under test
+# --------------------
+def start_app(mode, port):
+    """Run app.py on `port` in a scratch directory; returns (process, workdir)"""
+    workdir = tempfile.mkdtemp(prefix=f"subathon-{mode}-")
+    for name in os.listdir(REPO):
+        if name.endswith(".py") or (name.startswith("config") and name.endswith(".json")):
+            shutil.copy(os.path.join(REPO, name), workdir)
+
+    env = {k: v for k, v in os.environ.items()
+           if not k.startswith(("SE", "KICK_", "TIPEEE_", "STREAMERS"))}
+    env.update(ASYNC_MODE=mode, PORT=str(port), DEBUG="0", STREAMERS="1", SE_TWITCH_TOKEN="", SE_KICK_TOKEN="")
+    proc = subprocess.Popen([sys.executable, "app.py"], cwd=workdir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(base + "/state", timeout=1).read()
+            return proc, workdir
+        except Exception:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.1)
+    proc.kill()
+    shutil.rmtree(workdir, ignore_errors=True)
+    raise RuntimeError(f"app did not start in {mode} mode (is it installed?)")
+
+
+# --------------------
+# Overlay clients
+# --------------------
+class Overlay:
+    """One raw Engine.IO/Socket.IO connection that records timer_update latency"""
+
+    def __init__(self, port, results):
+        self.port = port
+        self.results = results
+        self.ws = None
+
+    def connect(self):
+        self.ws = websocket.create_connection(
+            f"ws://127.0.0.1:{self.port}/socket.io/?EIO=4&transport=websocket&streamer=1", timeout=10)
+        if not self.ws.recv().startswith("0"):    # engine.io open
+            raise ConnectionError("no engine.io handshake")
+        self.ws.send("40")                        # socket.io connect, default namespace
+        if not self.ws.recv().startswith("40"):
+            raise ConnectionError("socket.io connect refused")
+        self.ws.settimeout(None)
+        threading.Thread(target=self.loop, daemon=True).start()
+
+    def loop(self):
+        try:
+            while True:
+                msg = self.ws.recv()
+                if msg == "2":
+                    self.ws.send("3")             # engine.io ping -> pong
+                elif msg.startswith("42"):
+                    event, data = json.loads(msg[2:])
+                    if event == "timer_update":
+                        self.results.append(time.time() * 1000 - data["t"])
+        except Exception:
+            pass
+
+    def close(self):
+        try:
+            self.ws.shutdown()    # no close handshake, the server is killed anyway
+        except Exception:
+            pass
+
+
+def open_clients(port, count, results, parallel=50):
+    """Open `count` overlays, `parallel` at a time; returns (opened, failed)"""
+    opened, failed = [], [0]
+    lock = threading.Lock()
+    pending = list(range(count))
+
+    def worker():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                pending.pop()
+            o = Overlay(port, results)
+            try:
+                o.connect()
+                with lock:
+                    opened.append(o)
+            except Exception:
+                with lock:
+                    failed[0] += 1
+
+    workers = [threading.Thread(target=worker) for _ in range(parallel)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return opened, failed[0]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+# --------------------
+# Benchmark
+# --------------------
+def bench_mode(mode, step, maximum, max_failed):
+    port = free_port()
+    proc, workdir = start_app(mode, port)
+    base = f"http://127.0.0.1:{port}"
+    clients, rows = [], []
+    try:
+        time.sleep(1)
+        idle = rss_mb(proc.pid)
+        print(f"\n[{mode}] idle RSS {idle:.1f} MB")
+        print(f"{'clients':>8} {'failed':>7} {'RSS MB':>8} {'KB/client':>10} {'delivered':>10} {'p50 ms':>8} {'p99 ms':>8}")
+        while len(clients) < maximum:
+            results = []
+            for o in clients:
+                o.results = results
+            new, failed = open_clients(port, min(step, maximum - len(clients)), results)
+            clients.extend(new)
+            time.sleep(1)
+
+            urllib.request.urlopen(base + "/time?delta=1", timeout=30).read()
+            deadline = time.time() + 10
+            while len(results) < len(clients) and time.time() < deadline:
+                time.sleep(0.1)
+            lat = sorted(results)
+            rss = rss_mb(proc.pid)
+            row = {
+                "clients": len(clients), "failed": failed, "rss_mb": round(rss, 1),
+                "kb_per_client": round((rss - idle) * 1024 / max(1, len(clients)), 1),
+                "delivered": f"{len(lat)}/{len(clients)}",
+                "p50_ms": round(percentile(lat, 50), 1), "p99_ms": round(percentile(lat, 99), 1),
+            }
+            rows.append(row)
+            print(f"{row['clients']:>8} {row['failed']:>7} {row['rss_mb']:>8} {row['kb_per_client']:>10} "
+                  f"{row['delivered']:>10} {row['p50_ms']:>8} {row['p99_ms']:>8}")
+            if failed > max_failed or len(lat) < len(clients) or proc.poll() is not None:
+                break
+    finally:
+        proc.kill()
+        proc.wait()
+        for o in clients:
+            o.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {"mode": mode, "idle_rss_mb": round(idle, 1), "steps": rows,
+            "max_clients": max((r["clients"] for r in rows
+                                if r["delivered"] == f"{r['clients']}/{r['clients']}"), default=0)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Memory and max overlay connections per ASYNC_MODE")
+    ap.add_argument("--modes", default="threading,gevent")
+    ap.add_argument("--step", type=int, default=250, help="overlays added per step")
+    ap.add_argument("--max", type=int, default=2000, help="stop at this many overlays")
+    ap.add_argument("--max-failed", type=int, default=10, help="stop when a step has more failed connects")
+    ap.add_argument("--json", default=None, help="also write the results to this file")
+    args = ap.parse_args()
+
+    print(f"load generator: {CLIENT_MODE}")
+    summary = []
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        try:
+            summary.append(bench_mode(mode, args.step, args.max, args.max_failed))
+        except RuntimeError as e:
+            print(f"\n[{mode}] skipped: {e}")
+
+    print()
+    for s in summary:
+        last = s["steps"][-1] if s["steps"] else {}
+        print(f"{s['mode']:<10} idle {s['idle_rss_mb']} MB, {s['max_clients']} overlays fully served, "
+              f"{last.get('rss_mb', 0)} MB at {last.get('clients', 0)} overlays")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Swarm of headless overlay clients for load tests.
+
+Connects N Socket.IO clients to the app (like index.html does) and measures
+how long each timer_update takes to arrive: the payload carries the server
+time of the snapshot (`t`, epoch ms), so on the same machine
+arrival - t is the delivery latency including coalescing.
+
+    python tools/overlay_swarm.py --clients 100 --duration 60
+    python tools/overlay_swarm.py --clients 50 --streamers 1,2 --poke 0.5
+
+--poke N calls /time?delta=1 every N seconds, so the swarm also works
+without the fake upstreams.
+"""
+import time
+import argparse
+import threading
+import urllib.request
+
+import socketio
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+class Overlay:
+    def __init__(self, base, streamer, latencies, lock):
+        self.base = base
+        self.streamer = streamer
+        self.updates = 0
+        self.measuring = True
+        self.sio = socketio.Client(reconnection=True)
+        self.sio.on("timer_update", self.on_update)
+        self._latencies = latencies
+        self._lock = lock
+
+    def on_update(self, data):
+        if not self.measuring:
+            return
+        latency = time.time() * 1000 - data.get("t", 0)
+        self.updates += 1
+        with self._lock:
+            self._latencies.append(latency)
+
+    def connect(self):
+        self.sio.connect(f"{self.base}?streamer={self.streamer}", transports=["websocket"])
+
+    def close(self):
+        try:
+            self.sio.disconnect()
+        except Exception:
+            pass
+
+
+def poke(base, streamers, interval, stop):
+    i = 0
+    while not stop.is_set():
+        streamer = streamers[i % len(streamers)]
+        try:
+            urllib.request.urlopen(f"{base}/time?delta=1&streamer={streamer}", timeout=5).read()
+        except Exception as e:
+            print("poke failed:", e)
+        i += 1
+        stop.wait(interval)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Headless overlay clients measuring timer_update latency")
+    ap.add_argument("--url", default="http://localhost:5000")
+    ap.add_argument("--clients", type=int, default=50)
+    ap.add_argument("--streamers", default="1", help="comma separated, clients are spread over them")
+    ap.add_argument("--duration", type=float, default=30.0)
+    ap.add_argument("--poke", type=float, default=None, help="add 1 minute every N seconds")
+    args = ap.parse_args()
+
+    streamers = [s.strip() for s in args.streamers.split(",") if s.strip()]
+    latencies = []
+    lock = threading.Lock()
+    overlays = []
+    t0 = time.perf_counter()
+    failed = 0
+    for i in range(args.clients):
+        o = Overlay(args.url, streamers[i % len(streamers)], latencies, lock)
+        try:
+            o.connect()
+            overlays.append(o)
+        except Exception as e:
+            failed += 1
+            print(f"client {i} failed to connect:", e)
+    print(f"{len(overlays)} clients connected in {time.perf_counter() - t0:.2f}s ({failed} failed)")
+
+    stop = threading.Event()
+    if args.poke:
+        threading.Thread(target=poke, args=(args.url, streamers, args.poke, stop), daemon=True).start()
+
+    try:
+        time.sleep(args.duration)
+    except KeyboardInterrupt:
+        pass
+    stop.set()
+    # stop counting first, disconnecting one by one takes a while
+    for o in overlays:
+        o.measuring = False
+    closers = [threading.Thread(target=o.close) for o in overlays]
+    for t in closers:
+        t.start()
+    for t in closers:
+        t.join(5)
+
+    with lock:
+        lat = sorted(latencies)
+    per_client = [o.updates for o in overlays]
+    print(f"updates received: {len(lat)} "
+          f"(per client min {min(per_client, default=0)} / max {max(per_client, default=0)})")
+    print(f"latency ms: p50 {percentile(lat, 50):.1f}  p99 {percentile(lat, 99):.1f}  "
+          f"max {lat[-1] if lat else 0:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Offline replay benchmark for the reward path.
+
+Parses a recorded events.log ("[ts] [platform] RAW EVENT: {json}") and feeds
+every event through app.handle_event, including the delayed gift-bundle
+check, with Socket.IO, the log writer and the state journal stubbed out.
+Timers are paused during the replay so the final remaining time is exactly
+start + everything added.
+
+    python tools/replay_bench.py events.log
+    python tools/replay_bench.py events.log --speed 60          # 60x recorded speed
+    python tools/replay_bench.py events.log --time-log time_add.log
+    python tools/replay_bench.py events.log --save-baseline bench.json
+    python tools/replay_bench.py events.log --compare bench.json
+
+Exit code 1 if --compare finds a regression or the totals differ.
+"""
+import os
+import re
+import sys
+import json
+import time
+import atexit
+import heapq
+import shutil
+import tempfile
+import argparse
+import contextlib
+import datetime
+import itertools
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LINE_RE = re.compile(r"^\[(?P<ts>[^\]]+)\] \[(?P<platform>[^\]]+)\] RAW EVENT: (?P<json>.*)$")
+MINUTES_RE = re.compile(r"\|\s*\+(\d+) minutes")
+TS_FORMAT = "%d.%m.%Y - %H:%M"
+
+
+def parse_log(path):
+    """Yield (epoch seconds, platform, event dict) for every RAW EVENT line"""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            m = LINE_RE.match(line.rstrip("\n"))
+            if not m:
+                continue
+            try:
+                data = json.loads(m.group("json"))
+                when = datetime.datetime.strptime(m.group("ts"), TS_FORMAT).timestamp()
+            except ValueError:
+                continue
+            if isinstance(data, dict):
+                yield when, m.group("platform"), data
+
+
+def live_minutes(path):
+    """Sum of '+N minutes' in a time_add.log, to compare against the replay"""
+    total = 0
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            m = MINUTES_RE.search(line)
+            if m:
+                total += int(m.group(1))
+    return total
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+# --------------------
+# Stubs
+# --------------------
+class StubSocketIO:
+    """Counts emits; background tasks run inline so broadcasts stay deterministic"""
+
+    def __init__(self):
+        self.emits = 0
+
+    def emit(self, *args, **kwargs):
+        self.emits += 1
+
+    def start_background_task(self, fn, *args, **kwargs):
+        fn(*args, **kwargs)
+
+    def sleep(self, seconds):
+        pass
+
+
+class StubLogWriter:
+    dropped_total = 0
+
+    def __init__(self):
+        self.lines = 0
+
+    def write(self, path, line):
+        self.lines += 1
+
+
+class VirtualScheduler:
+    """Scheduler driven by the recorded clock instead of wall time"""
+
+    def __init__(self):
+        self.now = 0.0
+        self._heap = []
+        self._seq = itertools.count()
+        self._cancelled = set()
+
+    def call_later(self, delay, fn, *args):
+        job = next(self._seq)
+        heapq.heappush(self._heap, (self.now + delay, job, fn, args))
+        return job
+
+    def cancel(self, job):
+        self._cancelled.add(job)
+
+    def pending(self):
+        return len(self._heap) - len(self._cancelled)
+
+    def advance(self, now):
+        """Run every job due up to `now` (None: everything)"""
+        while self._heap and (now is None or self._heap[0][0] <= now):
+            due, job, fn, args = heapq.heappop(self._heap)
+            self.now = max(self.now, due)
+            if job in self._cancelled:
+                self._cancelled.discard(job)
+                continue
+            fn(*args)
+        if now is not None:
+            self.now = max(self.now, now)
+
+
+class InlineIngest:
+    """Applies envelopes immediately (the replay loop is the worker)"""
+
+    def __init__(self, app, latencies):
+        self.app = app
+        self.latencies = latencies
+
+    def submit(self, source, etype, data, streamer=None):
+        from ingest import Envelope
+        env = Envelope(source, etype, data, streamer, time.monotonic())
+        t0 = time.perf_counter()
+        self.app.apply_envelope(env)
+        self.latencies.append(time.perf_counter() - t0)
+        return True
+
+    submit_internal = submit
+
+
+def load_app(streamers):
+    """Import app.py in a scratch directory so no real state or logfile is touched"""
+    workdir = tempfile.mkdtemp(prefix="subathon-replay-")
+    for name in os.listdir(REPO):
+        if name.startswith("config") and name.endswith(".json"):
+            shutil.copy(os.path.join(REPO, name), workdir)
+    os.chdir(workdir)
+    os.environ["DEBUG"] = "0"
+    if streamers:
+        os.environ["STREAMERS"] = streamers
+    sys.path.insert(0, REPO)
+    import app
+    atexit.unregister(app.dedup.close)   # the scratch directory is gone by then
+    return app, workdir
+
+
+def streamer_for(app, platform):
+    """Events are logged with '<label>-<connector>' as platform"""
+    for s in app.STREAMERS.values():
+        if platform.startswith(s.label + "-") or platform == s.label:
+            return s
+    return app.STREAMERS[app.DEFAULT_STREAMER]
+
+
+# --------------------
+# Replay
+# --------------------
+def replay(app, events, speed=None):
+    latencies = []
+    sio = StubSocketIO()
+    writer = StubLogWriter()
+    sched = VirtualScheduler()
+
+    app.log_writer = writer
+    app.socketio = sio
+    app.broadcaster.socketio = sio
+    app.broadcaster.window = 0
+    app.reward_batcher.window = 0      # one by one, in replay order
+    app.scheduler = app.broadcaster.scheduler = app.reward_batcher.scheduler = sched
+    app.ingest = InlineIngest(app, latencies)
+
+    starts = {}
+    for timer in app.TIMERS.values():
+        timer.journal.record = lambda op, state: None
+        with timer.lock:
+            timer.set_paused(True)
+        starts[timer.name] = timer.remaining()
+
+    first_ts = None
+    wall0 = time.perf_counter()
+    count = 0
+    for when, platform, data in events:
+        if first_ts is None:
+            first_ts = when
+        if speed:
+            target = wall0 + (when - first_ts) / speed
+            delay = target - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        sched.advance(when - first_ts)
+        app.ingest.submit(platform, data.get("type"), data, streamer_for(app, platform))
+        count += 1
+    sched.advance(None)  # flush pending gift checks
+    elapsed = time.perf_counter() - wall0
+
+    lat = sorted(latencies)
+    remaining = {t.name: t.remaining() for t in app.TIMERS.values()}
+    added = sum(remaining[n] - starts[n] for n in remaining) // 60
+    return {
+        "events": count,
+        "applied": len(latencies),
+        "elapsed_s": round(elapsed, 4),
+        "events_per_sec": round(count / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(lat, 50) * 1000, 4),
+        "p99_ms": round(percentile(lat, 99) * 1000, 4),
+        "minutes_added": added,
+        "remaining": remaining,
+        "emits": sio.emits,
+        "log_lines": writer.lines,
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Return a list of problems (empty = ok)"""
+    problems = []
+    if result["minutes_added"] != baseline.get("minutes_added"):
+        problems.append(f"minutes_added {result['minutes_added']} != baseline {baseline.get('minutes_added')}")
+    base_eps = baseline.get("events_per_sec") or 0
+    if base_eps and result["events_per_sec"] < base_eps * (1 - tolerance):
+        problems.append(f"events_per_sec {result['events_per_sec']} < baseline {base_eps} (-{tolerance:.0%})")
+    base_p99 = baseline.get("p99_ms") or 0
+    if base_p99 and result["p99_ms"] > base_p99 * (1 + tolerance):
+        problems.append(f"p99_ms {result['p99_ms']} > baseline {base_p99} (+{tolerance:.0%})")
+    return problems
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay a recorded events.log through handle_event")
+    ap.add_argument("log", help="recorded events.log")
+    ap.add_argument("--speed", type=float, default=None,
+                    help="replay at N x recorded speed (default: as fast as possible)")
+    ap.add_argument("--streamers", default=None, help="STREAMERS value for the replay, e.g. 1,2")
+    ap.add_argument("--time-log", default=None, help="time_add.log of the live run to compare total minutes")
+    ap.add_argument("--save-baseline", default=None, help="write the result as baseline JSON")
+    ap.add_argument("--compare", default=None, help="compare against a baseline JSON")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown for --compare (default 0.2)")
+    args = ap.parse_args()
+
+    log_path = os.path.abspath(args.log)
+    time_log = os.path.abspath(args.time_log) if args.time_log else None
+    baseline_in = os.path.abspath(args.compare) if args.compare else None
+    baseline_out = os.path.abspath(args.save_baseline) if args.save_baseline else None
+
+    events = list(parse_log(log_path))
+    app, workdir = load_app(args.streamers)
+    try:
+        # console output of the reward path still costs, but is not shown
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            result = replay(app, events, args.speed)
+    finally:
+        app.dedup.flush()   # the writer thread appends into the scratch directory
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps(result, indent=2))
+    failed = False
+
+    if time_log:
+        live = live_minutes(time_log)
+        ok = live == result["minutes_added"]
+        print(f"live run added {live} minutes, replay {result['minutes_added']} -> {'OK' if ok else 'MISMATCH'}")
+        failed |= not ok
+
+    if baseline_out:
+        with open(baseline_out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"baseline written to {baseline_out}")
+
+    if baseline_in:
+        with open(baseline_in, "r", encoding="utf-8") as f:
+            problems = compare(result, json.load(f), args.tolerance)
+        for p in problems:
+            print("REGRESSION:", p)
+        if not problems:
+            print("no regression against baseline")
+        failed |= bool(problems)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
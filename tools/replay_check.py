@@ -0,0 +1,105 @@
+"""
+Round trip check for the replay benchmark: live path -> events.log -> replay.
+
+Generates upstream payloads (the shapes of tools/fake_upstreams.py:
+StreamElements subs, gift bundles, bits and tips, Kick chat frames, Tipeee
+donations, plus some redeliveries as after a reconnect) and feeds them
+through the connector handlers of app.py, so events.log and time_add.log
+are written by the current code. Then tools/replay_bench.py replays that
+events.log and has to add exactly the minutes of the live run.
+
+    python tools/replay_check.py
+    python tools/replay_check.py --events 2000 --seed 7
+
+Exit code 1 if the replay differs from the live run.
+"""
+import os
+import sys
+import json
+import random
+import shutil
+import argparse
+import contextlib
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from replay_bench import load_app, StubSocketIO, VirtualScheduler, InlineIngest, live_minutes
+import fake_upstreams as fake
+
+
+def kick_frame(inner):
+    return json.dumps({"event": "App\\Events\\ChatMessageEvent", "data": json.dumps(inner),
+                       "channel": "chatrooms.1.v2"})
+
+
+def record(app, count, redeliver):
+    """Run `count` generated events through the connector handlers"""
+    streamer = app.STREAMERS[app.DEFAULT_STREAMER]
+    label = streamer.label
+    sched = VirtualScheduler()
+    app.socketio = app.broadcaster.socketio = app.reward_batcher.socketio = StubSocketIO()
+    app.broadcaster.window = 0
+    app.reward_batcher.window = 0
+    app.scheduler = app.broadcaster.scheduler = app.reward_batcher.scheduler = sched
+    app.ingest = InlineIngest(app, [])
+    for timer in app.TIMERS.values():
+        timer.journal.record = lambda op, state: None
+        with timer.lock:
+            timer.set_paused(True)
+
+    sent = []
+    for _ in range(count):
+        kind = random.choice(["sub", "sub", "cheer", "tip", "bundle", "kick", "kick_gift", "tipeee"])
+        if kind in ("sub", "cheer", "tip", "bundle"):
+            events = {"sub": lambda: [fake.se_sub()], "cheer": lambda: [fake.se_cheer()],
+                      "tip": lambda: [fake.se_tip()], "bundle": lambda: fake.se_gift_bundle(random.randint(2, 5))}[kind]()
+            for ev in events:
+                sent.append(("se", ev))
+        elif kind in ("kick", "kick_gift"):
+            sent.append(("kick", kick_frame(fake.kick_chat(gift=kind == "kick_gift"))))
+        else:
+            sent.append(("tipeee", fake.tipeee_donation()))
+        if sent and random.random() < redeliver:
+            sent.append(random.choice(sent))    # reconnect replay of an earlier event
+
+    for upstream, payload in sent:
+        if upstream == "se":
+            app.submit_event(f"{label}-Twitch", payload, streamer)
+        elif upstream == "kick":
+            app.handle_kick_chat(f"{label}-KickChat", payload, streamer)
+        else:
+            app.handle_tipeee_event(f"{label}-Tipeee", payload, streamer)
+    sched.advance(None)     # pending gift checks
+    app.log_writer.flush()
+    app.dedup.flush()
+    return len(sent)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay a log written by the current code and compare the minutes")
+    ap.add_argument("--events", type=int, default=500, help="generated upstream events")
+    ap.add_argument("--redeliver", type=float, default=0.05, help="share of events delivered twice")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    random.seed(args.seed)
+    bench = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replay_bench.py")
+    app, workdir = load_app(None)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            sent = record(app, args.events, args.redeliver)
+        log = os.path.join(workdir, app.LOG_FILE)
+        time_log = os.path.join(workdir, app.TIME_ADD_LOG)
+        print(f"live run: {sent} upstream messages, {live_minutes(time_log)} minutes added")
+        # a fresh process, like replaying a recorded log after the fact
+        result = subprocess.run([sys.executable, bench, log, "--time-log", time_log],
+                                capture_output=True, text=True)
+        print(result.stdout.strip().splitlines()[-1] if result.stdout.strip() else result.stderr)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(result.returncode)
+
+
+if __name__ == "__main__":
+    main()
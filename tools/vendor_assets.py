@@ -0,0 +1,83 @@
+"""
+Download the external overlay assets once, so the overlays work offline.
+
+Fetches the socket.io client into vendor/socket.io.min.js and the Google
+Fonts used by the overlays (Bebas Neue, Knewave) into vendor/fonts/, with
+a vendor/fonts.css pointing at the local copies. app.py serves them with
+immutable cache headers; until this has run it redirects to the CDNs.
+
+    python tools/vendor_assets.py
+    python tools/vendor_assets.py --socketio-url https://cdn.socket.io/4.7.5/socket.io.min.js
+
+Run it again to update; unchanged files are left alone.
+"""
+import os
+import re
+import sys
+import hashlib
+import argparse
+import urllib.parse
+import urllib.request
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from assets import FALLBACKS
+
+# Google Fonts picks the font format by User-Agent; this one gets woff2
+BROWSER_UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+FONT_URL_RE = re.compile(r"url\((https?://[^)]+)\)")
+
+
+def fetch(url):
+    req = urllib.request.Request(url, headers={"User-Agent": BROWSER_UA})
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return resp.read()
+
+
+def save(path, data):
+    """Write if changed; returns True if the file was written"""
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+
+def vendor_fonts(css_url, vendor_dir):
+    """Download the stylesheet and every font it references, rewrite the URLs to the local copies"""
+    css = fetch(css_url).decode("utf-8")
+    written = 0
+
+    def localize(m):
+        nonlocal written
+        url = m.group(1)
+        ext = os.path.splitext(urllib.parse.urlparse(url).path)[1] or ".woff2"
+        name = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16] + ext
+        written += save(os.path.join(vendor_dir, "fonts", name), fetch(url))
+        return f"url(fonts/{name})"
+
+    css = FONT_URL_RE.sub(localize, css)
+    written += save(os.path.join(vendor_dir, "fonts.css"), css.encode("utf-8"))
+    return written
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Vendor the socket.io client and the Google Fonts of the overlays")
+    ap.add_argument("--socketio-url", default=FALLBACKS["vendor/socket.io.min.js"])
+    ap.add_argument("--fonts-url", default=FALLBACKS["vendor/fonts.css"])
+    ap.add_argument("--dir", default=os.path.join(REPO, "vendor"), help="target directory")
+    args = ap.parse_args()
+
+    changed = save(os.path.join(args.dir, "socket.io.min.js"), fetch(args.socketio_url))
+    print(f"socket.io client: {'updated' if changed else 'unchanged'}")
+    print(f"fonts: {vendor_fonts(args.fonts_url, args.dir)} files updated")
+
+
+if __name__ == "__main__":
+    main()